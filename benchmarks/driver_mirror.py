@@ -0,0 +1,166 @@
+"""本地ChromeDriver模拟下载源
+
+模拟 LATEST_RELEASE / npm目录列表两种版本查询方式，提供zip下载和SHA-256校验文件，
+可以配置响应延迟、返回错误或提供损坏的文件，用于测试 chromedriver_cache 的缓存、并发查询和校验。
+
+    python benchmarks/driver_mirror.py
+
+直接运行时启动一个慢速、一个出错、一个校验失败和一个正常的下载源，
+依次测量缓存未命中和命中时的解析耗时。
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chromedriver_cache import Mirror, resolve_chromedriver, driver_executable
+
+class FixtureMirror:
+    """本地HTTP模拟下载源
+
+    latency      每个请求响应前的延迟（秒）
+    broken       所有请求返回500
+    corrupt      提供的zip与校验文件不一致
+    listing      使用npm目录列表方式查询版本
+    driver_size  模拟的chromedriver文件大小（字节）
+    """
+
+    def __init__(self, name, version='120.0.6099.109', latency=0.0, broken=False, corrupt=False,
+                 listing=False, driver_size=200000, port=0):
+        self.name = name
+        self.version = version
+        self.latency = latency
+        self.broken = broken
+        self.corrupt = corrupt
+        self.listing = listing
+        self.driver_size = driver_size
+        self.downloads = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def mirror(self):
+        """指向本模拟下载源的 Mirror"""
+        version_url = self.url + ('listing/' if self.listing else 'LATEST_RELEASE_{major}')
+        return Mirror(
+            self.name, version_url,
+            self.url + "{version}/{platform}/chromedriver-{platform}.zip",
+            listing=self.listing,
+            checksum_url=self.url + "{version}/{platform}/chromedriver-{platform}.zip.sha256"
+        )
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name=f"FixtureMirror-{self.name}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def build_zip(self, platform_name):
+        data = io.BytesIO()
+        with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(f"chromedriver-{platform_name}/{driver_executable()}", os.urandom(self.driver_size))
+            archive.writestr(f"chromedriver-{platform_name}/LICENSE.chromedriver", "fixture")
+        return data.getvalue()
+
+    def make_handler(self):
+        mirror = self
+        zips = {}
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if mirror.latency:
+                    time.sleep(mirror.latency)
+                if mirror.broken:
+                    self.send_error(500)
+                    return
+                major = mirror.version.split('.')[0]
+                path = self.path.lstrip('/')
+                if path == f"LATEST_RELEASE_{major}":
+                    self.send_data(mirror.version.encode(), 'text/plain')
+                elif path == 'listing/':
+                    names = [{'name': f"{v}/"} for v in ('119.0.6045.105', mirror.version, '121.0.6167.85')]
+                    self.send_data(json.dumps(names).encode(), 'application/json')
+                elif path.startswith(mirror.version + '/') and path.endswith('.zip'):
+                    platform_name = path.split('/')[1]
+                    content = zips.setdefault(platform_name, mirror.build_zip(platform_name))
+                    if mirror.corrupt:
+                        content = content[:-10] + b'\0' * 10
+                    mirror.downloads += 1
+                    self.send_data(content, 'application/zip')
+                elif path.startswith(mirror.version + '/') and path.endswith('.zip.sha256'):
+                    platform_name = path.split('/')[1]
+                    content = zips.setdefault(platform_name, mirror.build_zip(platform_name))
+                    self.send_data(hashlib.sha256(content).hexdigest().encode(), 'text/plain')
+                else:
+                    self.send_error(404)
+
+            def send_data(self, data, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s || %(message)s')
+    version = '120.0.6099.109'
+    mirrors = [
+        FixtureMirror('慢速下载源', version, latency=3.0),
+        FixtureMirror('出错下载源', version, broken=True),
+        FixtureMirror('损坏下载源', version, latency=0.05, corrupt=True),
+        FixtureMirror('正常下载源', version, latency=0.2, listing=True),
+    ]
+    cache_dir = tempfile.mkdtemp(prefix='driver_cache_')
+    try:
+        for mirror in mirrors:
+            mirror.start()
+        sources = [mirror.mirror() for mirror in mirrors]
+
+        start = time.monotonic()
+        path = resolve_chromedriver(cache_dir, sources, chrome_version=version)
+        cold = time.monotonic() - start
+        start = time.monotonic()
+        cached = resolve_chromedriver(cache_dir, sources, chrome_version=version)
+        warm = time.monotonic() - start
+
+        assert path and path == cached, "两次解析的驱动路径不一致"
+        print(f"缓存未命中: {cold:.2f}s（逐个尝试下载源至少需要 {3.0 + 0.05 + 0.2:.2f}s）")
+        print(f"缓存命中:   {warm * 1000:.1f}ms")
+        print(f"驱动路径:   {path}")
+    finally:
+        for mirror in mirrors:
+            mirror.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
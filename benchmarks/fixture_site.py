@@ -0,0 +1,333 @@
+"""本地模拟站点：离线模拟阿里巴巴搜索页、产品详情页和Importify插件面板
+
+页面结构与 utils.py 使用的选择器保持一致，可以配置页面延迟、面板各步骤延迟、
+导入耗时以及失败、已存在、区域限制的比例，用于在没有网络和Shopify商店的
+Linux机器上测量导入流程的吞吐量。
+"""
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, quote, urlsplit
+
+HOME_PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Alibaba fixture</title></head>
+<body>
+<div class="fy23-icbu-search-bar-inner">
+  <input class="search-bar-input util-ellipsis" type="text" value="">
+  <button class="fy23-icbu-search-bar-inner-button" type="button">Search</button>
+</div>
+<script>
+document.querySelector('.fy23-icbu-search-bar-inner-button').addEventListener('click', function () {
+  var keyword = document.querySelector('.search-bar-input').value;
+  location.href = '/trade/search?SearchText=' + encodeURIComponent(keyword);
+});
+</script>
+</body></html>
+""")
+
+SEARCH_PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$keyword - fixture search</title>
+<style>@font-face { font-family: "Fixture"; src: url("/static/fixture.woff2"); } body { font-family: "Fixture", sans-serif; }</style>
+</head>
+<body>
+<div class="fy23-icbu-search-bar-inner">
+  <input class="search-bar-input util-ellipsis" type="text" value="$keyword">
+  <button class="fy23-icbu-search-bar-inner-button" type="button">Search</button>
+</div>
+<div class="organic-list">
+$cards
+</div>
+$pagination
+</body></html>
+""")
+
+SEARCH_CARD = Template("""  <div class="fy23-search-card">
+    <a href="$href"><img src="/static/card_$index.jpg" width="220" height="220"><h2 class="search-card-e-title">$title</h2></a>
+    <div class="search-card-e-price-main">US$$$price</div>
+    <div class="search-card-m-sale-features__item">Min. order: $moq pieces</div>
+    <div class="search-card-e-company">$supplier</div>
+  </div>""")
+
+PRODUCT_PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$title</title>
+<style>.hidden { display: none; } .ms-drop { display: none; } .ms-drop.open { display: block; } li.hide { display: none; }</style>
+</head>
+<body>
+<h1>$title</h1>
+<button id="addBtnCon" type="button">Import to store</button>
+<div id="importify-panel" class="hidden">
+  <div id="draft-row" class="hidden"><span class="inactive">Draft</span></div>
+  <div id="result-row"></div>
+  <div id="form-row" class="hidden">
+    <button class="ms-choice" type="button"><span>Select collections</span></button>
+    <div class="ms-drop">
+      <div class="ms-search"><input type="text" value=""></div>
+      <ul>$collections</ul>
+    </div>
+    <button id="description_tab_button" type="button">Description</button>
+    <div id="description-panel" class="hidden"><p>Description</p></div>
+    <button class="accordion-tab accordion-custom-tab" data-actab-group="0" data-actab-id="2" type="button">Variants</button>
+    <div id="variants-panel" class="hidden">
+      <label><input type="radio" id="all_variants" name="variants"> Import all variants automatically</label>
+      <label><input type="radio" id="price_switch" name="variants"> Select which variants to include</label>
+      <div id="variants-table"></div>
+    </div>
+    <button class="accordion-tab accordion-custom-tab" data-actab-group="0" data-actab-id="3" type="button">Images</button>
+    <div id="images-panel" class="hidden"><p>Images</p></div>
+    <div style="height: 1200px"></div>
+    <button id="addBtnSec" type="button">Add to store</button>
+  </div>
+</div>
+<script>
+var STEP_MS = $step_ms;
+var IMPORT_MS = $import_ms;
+var OUTCOME = "$outcome";
+var VARIANTS = $variants;
+function show(id) { document.getElementById(id).classList.remove('hidden'); }
+function later(fn, ms) { setTimeout(fn, ms === undefined ? STEP_MS : ms); }
+document.getElementById('addBtnCon').addEventListener('click', function () {
+  later(function () { show('importify-panel'); show('draft-row'); });
+});
+document.querySelector('#draft-row span').addEventListener('click', function () {
+  later(function () {
+    var row = document.getElementById('result-row');
+    if (OUTCOME === 'region') {
+      row.innerHTML = "<div>Sorry, this product can't be shipped to your region.</div>";
+    } else if (OUTCOME === 'exists') {
+      row.innerHTML = '<div class="textcontainer centeralign home-content "><p>This product is already in your store, what would you like to do?</p></div>';
+    } else { show('form-row'); }
+  });
+});
+document.querySelector('button.ms-choice').addEventListener('click', function () {
+  later(function () { document.querySelector('.ms-drop').classList.add('open'); });
+});
+document.querySelector('.ms-search input').addEventListener('input', function () {
+  var term = this.value.toLowerCase().trim();
+  later(function () {
+    document.querySelectorAll('.ms-drop li').forEach(function (li) {
+      var text = li.querySelector('span').textContent.toLowerCase();
+      li.classList.toggle('hide', text.indexOf(term) < 0);
+    });
+  }, STEP_MS / 2);
+});
+document.querySelectorAll('.ms-drop input[type="checkbox"]').forEach(function (checkbox) {
+  checkbox.addEventListener('change', function () {
+    var selected = [];
+    document.querySelectorAll('.ms-drop input[type="checkbox"]').forEach(function (c) {
+      if (c.checked) { selected.push(c.nextElementSibling.textContent); }
+    });
+    document.querySelector('button.ms-choice span').textContent = selected.join(', ') || 'Select collections';
+  });
+});
+document.getElementById('description_tab_button').addEventListener('click', function () {
+  later(function () { show('description-panel'); });
+});
+document.querySelector('[data-actab-id="2"]').addEventListener('click', function () {
+  later(function () { show('variants-panel'); });
+});
+document.getElementById('price_switch').addEventListener('click', function () {
+  later(function () {
+    var rows = ['<table id="var_price"><tbody>'];
+    VARIANTS.forEach(function (v, i) {
+      rows.push('<tr data-index="' + i + '"><td><input type="checkbox" class="include_variant" checked></td>' +
+                '<td class="variant-title">' + v.title + '</td>' +
+                '<td><input type="text" class="variant-price" value="' + v.price + '"></td>' +
+                '<td class="variant-stock">' + v.stock + '</td></tr>');
+    });
+    rows.push('</tbody></table>');
+    document.getElementById('variants-table').innerHTML = rows.join('');
+  });
+});
+document.querySelector('[data-actab-id="3"]').addEventListener('click', function () {
+  later(function () { show('images-panel'); });
+});
+document.getElementById('addBtnSec').addEventListener('click', function () {
+  later(function () {
+    var container = document.createElement('div');
+    container.id = 'importify-app-container';
+    container.innerHTML = '<div class="textcontainer centeralign home-content "></div>';
+    document.body.appendChild(container);
+    later(function () {
+      var p = document.createElement('p');
+      p.textContent = OUTCOME === 'failure'
+        ? 'Something went wrong while creating the product, please try again.'
+        : 'We have successfully created the product page.';
+      if (OUTCOME !== 'hang') { container.firstChild.appendChild(p); }
+    }, IMPORT_MS);
+  });
+});
+</script>
+</body></html>
+""")
+
+class FixtureSite:
+    """本地HTTP模拟站点
+
+    page_latency     每个页面响应前的延迟（秒）
+    step_latency     Importify面板每一步操作的延迟（秒）
+    import_latency   点击添加到商店后到出现结果的时间（秒）
+    failure_rate     导入失败的比例
+    exists_rate      产品已在商店中的比例
+    region_rate      区域限制的比例
+    hang_rate        导入后一直没有结果的比例
+    asset_bytes      图片、字体等静态资源的大小（字节），用于比较精简模式节省的流量
+    """
+
+    def __init__(self, port=0, page_latency=0.2, step_latency=0.1, import_latency=1.0,
+                 failure_rate=0.0, exists_rate=0.0, region_rate=0.0, hang_rate=0.0,
+                 products_per_page=48, pages=3, variants=5, collections=None, seed=None,
+                 asset_bytes=40000):
+        self.page_latency = page_latency
+        self.step_latency = step_latency
+        self.import_latency = import_latency
+        self.failure_rate = failure_rate
+        self.exists_rate = exists_rate
+        self.region_rate = region_rate
+        self.hang_rate = hang_rate
+        self.products_per_page = products_per_page
+        self.pages = pages
+        self.variants = variants
+        self.asset_bytes = asset_bytes
+        self.collections = collections or ['Benchmark', 'Home & Garden', 'Pet Supplies', 'Kitchen']
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+        # 请求页面的浏览器User-Agent，用于确认浏览器是否以无头模式运行
+        self.user_agents = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="FixtureSite", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def pick_outcome(self):
+        with self.random_lock:
+            value = self.random.random()
+        for outcome, rate in (('region', self.region_rate), ('exists', self.exists_rate),
+                              ('failure', self.failure_rate), ('hang', self.hang_rate)):
+            if value < rate:
+                return outcome
+            value -= rate
+        return 'success'
+
+    def product_id(self, keyword, index):
+        digest = hashlib.md5(f"{keyword}|{index}".encode('utf-8')).hexdigest()
+        return str(1600000000000 + int(digest[:10], 16) % 100000000000)
+
+    def render_search(self, query):
+        keyword = query.get('SearchText', [''])[0]
+        page = max(1, int(query.get('page', ['1'])[0] or 1))
+        cards = []
+        if page <= self.pages:
+            for i in range(self.products_per_page):
+                index = (page - 1) * self.products_per_page + i
+                slug = quote(keyword.replace(' ', '-')) or 'product'
+                cards.append(SEARCH_CARD.substitute(
+                    index=index,
+                    href=f"/product-detail/{slug}-{index}_{self.product_id(keyword, index)}.html?spm=fixture",
+                    title=html.escape(f"{keyword} sample product {index}"),
+                    price=f"{1 + index % 50}.{index % 100:02d}",
+                    moq=10 * (1 + index % 5),
+                    supplier=html.escape(f"Supplier {index % 7}"),
+                ))
+        pagination = ''
+        if page < self.pages:
+            pagination = (f'<div class="seb-pagination"><a class="next-pagination-item next-next" '
+                          f'href="/trade/search?SearchText={quote(keyword)}&page={page + 1}">Next</a></div>')
+        return SEARCH_PAGE.substitute(keyword=html.escape(keyword), cards='\n'.join(cards), pagination=pagination)
+
+    def render_product(self, path):
+        variants = [
+            {'title': f'Variant {i + 1}', 'price': f'{5 + i * 1.5:.2f}', 'stock': 0 if i % 4 == 3 else 100 + i}
+            for i in range(self.variants)
+        ]
+        collections = '\n'.join(
+            f'<li><label><input type="checkbox" data-name="selectItem" value="{html.escape(name)}">'
+            f'<span>{html.escape(name)}</span></label></li>'
+            for name in self.collections
+        )
+        return PRODUCT_PAGE.substitute(
+            title=html.escape(path.rsplit('/', 1)[-1]),
+            collections=collections,
+            step_ms=int(self.step_latency * 1000),
+            import_ms=int(self.import_latency * 1000),
+            outcome=self.pick_outcome(),
+            variants=json.dumps(variants),
+        )
+
+    def make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                parts = urlsplit(self.path)
+                if parts.path == '/favicon.ico':
+                    self.send_error(404)
+                    return
+                if parts.path.startswith('/static/'):
+                    content_type = 'font/woff2' if parts.path.endswith('.woff2') else 'image/jpeg'
+                    self.send_data(b'\0' * site.asset_bytes, content_type)
+                    return
+                site.user_agents.add(self.headers.get('User-Agent', ''))
+                if site.page_latency:
+                    time.sleep(site.page_latency)
+                if parts.path in ('/', '/index.html'):
+                    body = HOME_PAGE.substitute()
+                elif parts.path.startswith('/trade/search'):
+                    body = site.render_search(parse_qs(parts.query))
+                elif parts.path.startswith('/product-detail/'):
+                    body = site.render_product(parts.path)
+                else:
+                    self.send_error(404)
+                    return
+                self.send_data(body.encode('utf-8'), 'text/html; charset=utf-8')
+
+            def send_data(self, data, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="启动本地模拟站点")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    with FixtureSite(port=args.port) as site:
+        print(f"模拟站点已启动: {site.url}  (Ctrl+C 退出)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,165 @@
+"""导入流程吞吐量基准测试
+
+在本地模拟站点上用 ImportEngine 运行真实的搜索和导入流程（与界面、命令行相同），
+输出每分钟导入的产品数和单个产品耗时的 p50/p95，以及各阶段耗时。
+引擎在临时目录中运行，已导入产品索引和任务日志每次都是空的，不影响仓库目录中的文件。
+无头模式是精简模式的选项，这里开启精简模式但不屏蔽任何资源，页面内容与默认设置相同。
+
+    python benchmarks/import_throughput.py --driver /usr/bin/chromedriver --keywords 3 --products 10
+
+设置 --min-throughput 后，吞吐量低于该值时以非0状态退出，可以在CI中发现性能回退。
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from fixture_site import FixtureSite
+from import_engine import ImportEngine
+from tracing import enable_tracing, disable_tracing
+from waits import wait_ledger
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+def summarize_trace(trace_path):
+    """从追踪文件中统计每个产品和每个阶段的耗时"""
+    products = []
+    stages = {}
+    with open(trace_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['name'] == 'import_product':
+                products.append(record)
+            else:
+                stages.setdefault(record['name'], []).append(record['dur'])
+    return products, stages
+
+def run_benchmark(args):
+    trace_dir = tempfile.mkdtemp(prefix='import_bench_')
+    trace_path = os.path.join(trace_dir, 'trace.jsonl')
+    site = FixtureSite(
+        page_latency=args.page_latency,
+        step_latency=args.step_latency,
+        import_latency=args.import_latency,
+        failure_rate=args.failure_rate,
+        exists_rate=args.exists_rate,
+        region_rate=args.region_rate,
+        products_per_page=args.products,
+        pages=args.pages,
+        variants=args.variants,
+        collections=[args.sheet, 'Home & Garden', 'Pet Supplies'],
+        seed=args.seed,
+    )
+    engine = ImportEngine(
+        [(f"benchmark keyword {i}", args.sheet) for i in range(args.keywords)],
+        {
+            'driver_path': args.driver,
+            'auto_download': False,
+            'worker_count': args.workers,
+            'target_products': args.target,
+            'lean_mode': True,
+            'headless': not args.show,
+            'blocked_types': '',
+        },
+    )
+    cwd = os.getcwd()
+    try:
+        site.start()
+        utils.BASE_URL = site.url
+        os.chdir(trace_dir)
+        # 引擎在 run() 中重置等待统计，结束时关闭追踪并写入文件
+        enable_tracing(trace_path)
+        start = time.monotonic()
+        stats = engine.run()
+        elapsed = time.monotonic() - start
+    finally:
+        os.chdir(cwd)
+        disable_tracing()
+        site.stop()
+    if not stats.completed and not stats.outcomes:
+        raise SystemExit("没有处理任何产品，请检查 --driver 参数和日志")
+    # 无头Chrome的User-Agent中包含HeadlessChrome；出现有界面的浏览器说明设置没有生效
+    windowed = [agent for agent in site.user_agents if 'HeadlessChrome' not in agent]
+    if not args.show and windowed:
+        raise SystemExit(f"浏览器没有以无头模式运行: {windowed[0]}")
+
+    products, stages = summarize_trace(trace_path)
+    shutil.rmtree(trace_dir, ignore_errors=True)
+    durations = [p['dur'] for p in products]
+    imported = sum(1 for p in products if p['attrs'].get('outcome') == 'imported')
+    return {
+        'elapsed': elapsed,
+        'products': len(products),
+        'imported': imported,
+        'throughput': len(products) / elapsed * 60 if elapsed else 0.0,
+        'p50': percentile(durations, 50),
+        'p95': percentile(durations, 95),
+        'stages': {
+            name: {'count': len(values), 'p50': percentile(values, 50), 'p95': percentile(values, 95)}
+            for name, values in stages.items()
+        },
+        'waits': wait_ledger.report(),
+    }
+
+def print_report(result):
+    print(f"总耗时: {result['elapsed']:.1f}s")
+    print(f"处理产品: {result['products']}，导入成功: {result['imported']}")
+    print(f"吞吐量: {result['throughput']:.1f} 个产品/分钟")
+    print(f"单个产品耗时: p50 {result['p50']:.2f}s, p95 {result['p95']:.2f}s")
+    print("各阶段耗时:")
+    for name, stat in sorted(result['stages'].items(), key=lambda item: -item[1]['p50']):
+        print(f"  {name:<20} {stat['count']:>5} 次  p50 {stat['p50']:.2f}s  p95 {stat['p95']:.2f}s")
+    print(result['waits'])
+
+def main():
+    parser = argparse.ArgumentParser(description="在本地模拟站点上测量导入吞吐量")
+    parser.add_argument('--driver', default=os.environ.get('CHROMEDRIVER') or shutil.which('chromedriver'),
+                        help="ChromeDriver路径（默认读取 CHROMEDRIVER 环境变量或 PATH）")
+    parser.add_argument('--keywords', type=int, default=3, help="搜索关键词数量")
+    parser.add_argument('--workers', type=int, default=1, help="并行导入浏览器数量")
+    parser.add_argument('--products', type=int, default=10, help="每页的产品数量")
+    parser.add_argument('--pages', type=int, default=1, help="每个关键词的搜索结果页数")
+    parser.add_argument('--target', type=int, default=0, help="每个关键词的目标产品数（0为只取第一页）")
+    parser.add_argument('--variants', type=int, default=5, help="每个产品的变体数量")
+    parser.add_argument('--sheet', default='Benchmark', help="目标分类名称")
+    parser.add_argument('--page-latency', type=float, default=0.2, help="页面响应延迟（秒）")
+    parser.add_argument('--step-latency', type=float, default=0.1, help="Importify面板每一步的延迟（秒）")
+    parser.add_argument('--import-latency', type=float, default=1.0, help="导入结果出现前的延迟（秒）")
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--exists-rate', type=float, default=0.0)
+    parser.add_argument('--region-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--show', action='store_true', help="显示浏览器窗口（默认无头模式）")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    parser.add_argument('--min-throughput', type=float, help="吞吐量低于该值（个/分钟）时返回失败")
+    args = parser.parse_args()
+
+    if not args.driver:
+        parser.error("找不到ChromeDriver，请使用 --driver 指定")
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s || %(message)s')
+    result = run_benchmark(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.min_throughput and result['throughput'] < args.min_throughput:
+        print(f"吞吐量低于 {args.min_throughput} 个/分钟")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""关键词读取性能测试
+
+生成一个大的关键词文件（默认一百万行，约20%重复），分别用原来的pandas方式
+（read_excel 读入全部工作表再取第一列去重）和流式读取（keyword_sources）生成导入任务，
+比较耗时和进程峰值内存。每种方式在单独的子进程中运行，峰值内存互不影响。
+
+    python benchmarks/keyword_ingest.py
+    python benchmarks/keyword_ingest.py --rows 200000 --format csv
+
+pandas方式只用于Excel工作簿；CSV、TXT、JSONL只测量流式读取。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 每个工作表的行数，超过时分成多个工作表（Excel单个工作表最多1048576行）
+ROWS_PER_SHEET = 250000
+
+def keyword_rows(rows, duplicate_ratio):
+    unique = max(1, int(rows * (1 - duplicate_ratio)))
+    for i in range(rows):
+        yield f"Keyword  {i % unique} pet pad"
+
+def generate(path, rows, duplicate_ratio):
+    extension = os.path.splitext(path)[1]
+    keywords = keyword_rows(rows, duplicate_ratio)
+    if extension == '.xlsx':
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = None
+        for i, keyword in enumerate(keywords):
+            if i % ROWS_PER_SHEET == 0:
+                sheet = workbook.create_sheet(f"分类{i // ROWS_PER_SHEET + 1}")
+            sheet.append([keyword])
+        workbook.save(path)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for i, keyword in enumerate(keywords):
+                if extension == '.csv':
+                    f.write(f"{keyword},分类{i // ROWS_PER_SHEET + 1}\n")
+                elif extension == '.jsonl':
+                    f.write(json.dumps({'keyword': keyword, 'collection': f"分类{i // ROWS_PER_SHEET + 1}"},
+                                       ensure_ascii=False) + "\n")
+                else:
+                    f.write(keyword + "\n")
+
+def pandas_jobs(path):
+    """原来的读取方式：一次读入全部工作表，再取第一列去重"""
+    import pandas as pd
+    from keyword_sources import normalize_keyword
+    jobs = []
+    seen = set()
+    for sheet_name, df in pd.read_excel(path, sheet_name=None, header=None).items():
+        if df.empty:
+            continue
+        for value in df.iloc[:, 0].dropna().tolist():
+            keyword = str(value).strip()
+            key = normalize_keyword(keyword)
+            if keyword and key not in seen:
+                seen.add(key)
+                jobs.append((keyword, str(sheet_name)))
+    return jobs
+
+def streaming_jobs(path):
+    from job_planner import plan_import_jobs
+    return plan_import_jobs(path).jobs
+
+def peak_rss_mb():
+    if not resource:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位是KB，macOS是字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def measure(method, path):
+    """在当前进程中运行一种读取方式，输出JSON结果（由子进程调用）"""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    jobs = (pandas_jobs if method == 'pandas' else streaming_jobs)(path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'jobs': len(jobs), 'baseline_mb': baseline, 'peak_mb': peak_rss_mb()}))
+
+def run_method(method, path):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--measure', method, path],
+        capture_output=True, text=True
+    )
+    if output.returncode != 0:
+        raise SystemExit(f"{method} 运行失败:\n{output.stderr[-2000:]}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="比较pandas读取和流式读取关键词文件的耗时与内存")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--duplicates', type=float, default=0.2, help="重复关键词的比例")
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'txt', 'jsonl'], default='xlsx')
+    parser.add_argument('--input', help="使用已有的关键词文件，不生成")
+    parser.add_argument('--measure', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='keywords_') as directory:
+        path = args.input
+        if not path:
+            path = os.path.join(directory, f"keywords.{args.format}")
+            start = time.perf_counter()
+            generate(path, args.rows, args.duplicates)
+            print(f"生成 {args.rows} 行 {args.format} 文件: {time.perf_counter() - start:.1f}s，"
+                  f"{os.path.getsize(path) / 1024 / 1024:.1f}MB")
+
+        methods = ['streaming']
+        if path.lower().endswith(('.xlsx', '.xlsm', '.xls')):
+            methods.insert(0, 'pandas')
+        for method in methods:
+            result = run_method(method, path)
+            memory = ''
+            if result['peak_mb'] is not None:
+                memory = f"，峰值内存 {result['peak_mb']:.0f}MB（读取前 {result['baseline_mb']:.0f}MB）"
+            print(f"{method:<10} {result['seconds']:7.2f}s，{result['jobs']} 个关键词{memory}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""精简浏览器模式对比测试
+
+分别用默认模式和精简模式（无头、eager加载策略、屏蔽图片/字体/视频/统计脚本）打开同一组页面，
+比较页面加载时间（driver.get 返回所需时间）和传输的字节数。
+
+    python benchmarks/lean_mode.py --driver /usr/bin/chromedriver
+    python benchmarks/lean_mode.py --driver /usr/bin/chromedriver --url "https://www.alibaba.com/trade/search?SearchText=pet+pad"
+
+不指定 --url 时使用本地模拟站点。字节数来自 Performance API 的 transferSize，
+跨域且没有 Timing-Allow-Origin 的资源会计为0，真实站点的结果只能作为下限参考。
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from fixture_site import FixtureSite
+
+TRANSFER_SIZE_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var total = 0;
+for (var i = 0; i < entries.length; i++) { total += entries[i].transferSize || 0; }
+return {bytes: total, requests: entries.length};
+"""
+
+def measure(driver_path, urls, lean, show, repeat):
+    utils.set_browser_options(lean=lean, headless=not show)
+    driver = utils.open_browser(driver_path, None, headless=not show)
+    if not driver:
+        raise SystemExit("无法启动浏览器，请检查 --driver 参数")
+    load_times = []
+    total_bytes = 0
+    total_requests = 0
+    try:
+        for _ in range(repeat):
+            for url in urls:
+                # 清空缓存，保证每次都是完整加载
+                driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+                start = time.monotonic()
+                driver.get(url)
+                load_times.append(time.monotonic() - start)
+                # 给仍在加载的资源一点时间，再统计传输量
+                time.sleep(1)
+                stats = driver.execute_script(TRANSFER_SIZE_SCRIPT)
+                total_bytes += stats['bytes']
+                total_requests += stats['requests']
+    finally:
+        driver.quit()
+    pages = len(load_times)
+    return {
+        'p50': statistics.median(load_times),
+        'mean': statistics.mean(load_times),
+        'bytes': total_bytes / pages,
+        'requests': total_requests / pages,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="比较默认模式和精简模式的页面加载时间与流量")
+    parser.add_argument('--driver', default=os.environ.get('CHROMEDRIVER') or shutil.which('chromedriver'))
+    parser.add_argument('--url', action='append', help="要测试的页面（可以多次指定），默认使用本地模拟站点")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--show', action='store_true', help="默认模式下显示浏览器窗口")
+    args = parser.parse_args()
+    if not args.driver:
+        parser.error("找不到ChromeDriver，请使用 --driver 指定")
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s || %(message)s')
+
+    site = None
+    urls = args.url
+    if not urls:
+        site = FixtureSite(page_latency=0.1, products_per_page=48).start()
+        urls = [f"{site.url}trade/search?SearchText=lean+mode+{i}" for i in range(3)]
+    try:
+        default = measure(args.driver, urls, lean=False, show=args.show, repeat=args.repeat)
+        lean = measure(args.driver, urls, lean=True, show=False, repeat=args.repeat)
+    finally:
+        if site:
+            site.stop()
+
+    print(f"{'':<8}{'加载p50':>10}{'加载均值':>10}{'请求数':>10}{'传输KB':>12}")
+    for name, result in (('默认', default), ('精简', lean)):
+        print(f"{name:<8}{result['p50']:>9.2f}s{result['mean']:>9.2f}s{result['requests']:>10.0f}{result['bytes'] / 1024:>12.1f}")
+    if default['bytes']:
+        print(f"流量减少 {(1 - lean['bytes'] / default['bytes']) * 100:.0f}%，"
+              f"加载时间减少 {(1 - lean['p50'] / default['p50']) * 100:.0f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""程序启动耗时测试
+
+在子进程中启动主窗口，测量从进程启动到窗口第一次绘制的时间（time-to-first-window），
+并记录此时已经加载了哪些较重的模块；再用 python -X importtime 统计 import main 的耗时分布。
+每次运行都是新的解释器进程，结果包含冷启动时的全部导入开销。
+
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --runs 5 --top 15 --offscreen
+
+启动阶段不应该加载 openpyxl、pandas、selenium、requests：openpyxl在第一次读取 .xlsx 工作簿时加载，
+pandas只在读取旧版 .xls 工作簿时加载，selenium在第一次开始导入时加载，requests在下载ChromeDriver时才加载。
+检测到这些模块时会给出提示。
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动阶段不应该加载的模块
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'selenium', 'requests')
+
+# 子进程：显示主窗口，第一次绘制时输出耗时和已加载的模块，然后退出
+CHILD_SCRIPT = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, ROOT)
+import main
+imported = time.perf_counter()
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from PyQt6.QtWidgets import QApplication
+
+class FirstPaint(QObject):
+    def __init__(self):
+        super().__init__()
+        self.result = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and self.result is None:
+            self.result = {
+                'import_main': imported - start,
+                'first_window': time.perf_counter() - start,
+                'loaded': [name for name in HEAVY_MODULES if name in sys.modules],
+            }
+            # 窗口显示后排队的任务（例如读取上次的工作簿）执行完再退出
+            QTimer.singleShot(0, self.finish)
+        return False
+
+    def finish(self):
+        self.result['ready'] = time.perf_counter() - start
+        print(json.dumps(self.result), flush=True)
+        QApplication.quit()
+
+app = QApplication(sys.argv)
+window = main.ImportifyApp(main.setup_logging())
+watcher = FirstPaint()
+window.installEventFilter(watcher)
+window.show()
+QTimer.singleShot(30000, QApplication.quit)
+app.exec()
+'''
+
+def run_child(offscreen):
+    """启动一次主窗口，返回耗时字典（process 为包括解释器启动和退出在内的子进程总耗时）"""
+    env = dict(os.environ)
+    if offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    code = f"ROOT = {ROOT!r}\nHEAVY_MODULES = {HEAVY_MODULES!r}\n" + CHILD_SCRIPT
+    # 在临时目录中运行，日志等文件不写入仓库
+    with tempfile.TemporaryDirectory(prefix='startup_') as cwd:
+        start = time.monotonic()
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+        )
+        elapsed = time.monotonic() - start
+    lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+    if not lines:
+        raise SystemExit(f"主窗口没有显示:\n{output.stderr[-2000:]}")
+    result = json.loads(lines[-1])
+    result['process'] = elapsed
+    return result
+
+def import_breakdown(module):
+    """用 -X importtime 统计导入耗时，返回 (总耗时秒, [(模块, 累计秒)])
+
+    只列出被测模块直接导入的模块（累计耗时包含它们各自的依赖）。
+    """
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    children = {}
+    total = None
+    for line in output.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)', line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1e6, len(match.group(3)) // 2, match.group(4)
+        # importtime 先输出被导入的模块，再输出导入它的模块，每深一层多缩进两个空格
+        if depth == 0:
+            if name == module:
+                total = cumulative
+                break
+            children = {}
+        elif depth == 1:
+            children[name] = children.get(name, 0) + cumulative
+    if output.returncode != 0 or total is None:
+        raise SystemExit(f"导入 {module} 失败:\n{output.stderr[-2000:]}")
+    return total, sorted(children.items(), key=lambda item: item[1], reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="测量主窗口的启动耗时和导入耗时分布")
+    parser.add_argument('--runs', type=int, default=3, help="启动主窗口的次数，取中位数")
+    parser.add_argument('--top', type=int, default=10, help="导入耗时分布中显示的模块数量")
+    parser.add_argument('--module', default='main', help="统计导入耗时的模块")
+    parser.add_argument('--offscreen', action='store_true', help="不显示窗口（无显示器的环境）")
+    parser.add_argument('--skip-window', action='store_true', help="只统计导入耗时")
+    args = parser.parse_args()
+
+    if not args.skip_window:
+        results = [run_child(args.offscreen) for _ in range(args.runs)]
+        for key, label in (('process', '子进程总耗时'), ('first_window', '解释器就绪到窗口绘制'),
+                           ('import_main', 'import main'), ('ready', '窗口就绪（含读取上次的工作簿）')):
+            values = [result[key] for result in results]
+            print(f"{label}: 中位数 {statistics.median(values) * 1000:.0f}ms "
+                  f"（{min(values) * 1000:.0f}-{max(values) * 1000:.0f}ms，{len(values)} 次）")
+        loaded = sorted({name for result in results for name in result['loaded']})
+        if loaded:
+            print(f"警告: 窗口显示前已加载 {', '.join(loaded)}，请检查是否有模块在顶层导入了它们")
+        print()
+
+    total, packages = import_breakdown(args.module)
+    print(f"import {args.module}: {total * 1000:.0f}ms")
+    for name, seconds in packages[:args.top]:
+        print(f"  {name:<24} {seconds * 1000:8.1f}ms  {seconds / total:6.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import logging
+import os
+import subprocess
+import threading
+import time
+from selenium.webdriver.remote.command import Command
+from utils import open_browser, prepare_worker_profile
+
+# 单个WebDriver命令的默认期限（秒），超过期限仍未返回视为浏览器卡死
+COMMAND_DEADLINE = 90
+
+# 页面加载和异步等待脚本本身最长可以执行120秒，期限在默认值基础上额外放宽
+SLOW_COMMANDS = {Command.GET, Command.W3C_EXECUTE_SCRIPT_ASYNC, Command.REFRESH, Command.GO_BACK}
+SLOW_COMMAND_EXTRA = 120
+
+def kill_browser(driver):
+    """强制结束ChromeDriver及其启动的Chrome进程，正在等待的命令会立即出错返回"""
+    kill_service(getattr(driver, 'service', None))
+
+def kill_service(service):
+    """强制结束ChromeDriver服务进程及其子进程（Chrome）"""
+    process = getattr(service, 'process', None)
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True, timeout=15)
+        else:
+            subprocess.run(['pkill', '-KILL', '-P', str(process.pid)], capture_output=True, timeout=15)
+            process.kill()
+    except Exception as e:
+        logging.warning(f"结束浏览器进程失败: {str(e)}")
+
+class BrowserSupervisor:
+    """管理一个工作者的浏览器
+
+    启动浏览器（ChromeDriver启动和创建会话）和每个WebDriver命令都有期限，看门狗线程发现超过期限时
+    强制结束浏览器，卡住的调用随即出错返回；下次调用 ensure() 时用相同的ChromeDriver路径和用户目录重新启动。
+    keep_spare为True时在后台预先启动一个备用浏览器，主浏览器失效时直接切换，不用等待Chrome冷启动。
+    备用浏览器使用单独的用户目录副本，两个目录在主备切换时轮换使用。
+    """
+
+    def __init__(self, name, driver_path=None, user_data_dir=None, worker_id=0, keep_spare=False,
+                 command_deadline=COMMAND_DEADLINE, on_launch=None, on_discard=None, is_active=None):
+        self.name = name
+        self.driver_path = driver_path
+        self.profiles = [prepare_worker_profile(user_data_dir, worker_id)]
+        if keep_spare:
+            self.profiles.append(prepare_worker_profile(user_data_dir, f"{worker_id}_spare"))
+        self.keep_spare = keep_spare
+        self.command_deadline = command_deadline
+        self.on_launch = on_launch
+        self.on_discard = on_discard
+        self.is_active = is_active or (lambda: True)
+        self.lock = threading.Lock()
+        self.deadlines = {}
+        self.launches = {}
+        self.killed = set()
+        self.driver = None
+        self.profile = self.profiles[0]
+        self.spare = None
+        self.spare_thread = None
+        self.stop_event = threading.Event()
+        self.watchdog = None
+
+    def start(self):
+        """启动主浏览器（和备用浏览器）以及看门狗，返回主浏览器，无法启动时返回None"""
+        self.watchdog = threading.Thread(target=self.watch, name=f"Watchdog-{self.name}", daemon=True)
+        self.watchdog.start()
+        self.driver = self.launch(self.profile)
+        if self.driver and self.keep_spare:
+            self.prepare_spare(self.profiles[1])
+        return self.driver
+
+    def launch(self, profile, retries=3):
+        """启动浏览器并接入命令期限，失败时重试"""
+        for retry in range(retries):
+            if not self.is_active() or self.stop_event.is_set():
+                return None
+            try:
+                driver = self.open_with_deadline(profile)
+                if driver:
+                    self.install(driver)
+                    if self.on_launch:
+                        self.on_launch(driver)
+                    return driver
+            except Exception as e:
+                logging.error(f"{self.name} 创建浏览器实例失败 (尝试 {retry + 1}/{retries}): {str(e)}")
+            time.sleep(2)
+        return None
+
+    def open_with_deadline(self, profile):
+        """启动浏览器，超过期限时看门狗结束ChromeDriver和Chrome进程，open_browser 随即出错返回None"""
+        services = []
+        key = threading.get_ident()
+        with self.lock:
+            self.launches[key] = (time.monotonic() + self.command_deadline, services)
+        try:
+            return open_browser(self.driver_path, profile, on_service=services.append)
+        finally:
+            with self.lock:
+                self.launches.pop(key, None)
+
+    def install(self, driver):
+        """包装命令执行器，为每个命令登记期限"""
+        executor = driver.command_executor
+        execute = executor.execute
+
+        def supervised_execute(command, params):
+            deadline = self.command_deadline + (SLOW_COMMAND_EXTRA if command in SLOW_COMMANDS else 0)
+            key = threading.get_ident()
+            with self.lock:
+                self.deadlines[key] = (time.monotonic() + deadline, command, driver)
+            try:
+                return execute(command, params)
+            finally:
+                with self.lock:
+                    self.deadlines.pop(key, None)
+
+        executor.execute = supervised_execute
+
+    def watch(self):
+        """看门狗：结束命令超过期限的浏览器"""
+        while not self.stop_event.wait(0.5):
+            now = time.monotonic()
+            with self.lock:
+                expired = [key for key, (expires, _, _) in self.deadlines.items() if expires <= now]
+                entries = [self.deadlines.pop(key) for key in expired]
+                expired = [key for key, (expires, _) in self.launches.items() if expires <= now]
+                launches = [self.launches.pop(key)[1] for key in expired]
+            for services in launches:
+                logging.error(f"{self.name} 的浏览器启动超过 {self.command_deadline} 秒仍未完成，强制结束ChromeDriver和Chrome")
+                for service in services:
+                    kill_service(service)
+            for _, command, driver in entries:
+                logging.error(f"{self.name} 的浏览器命令 {command} 超过期限未返回，强制结束浏览器")
+                with self.lock:
+                    self.killed.add(driver)
+                kill_browser(driver)
+
+    def prepare_spare(self, profile):
+        def run():
+            driver = self.launch(profile)
+            with self.lock:
+                self.spare = (driver, profile) if driver else None
+            if driver:
+                logging.info(f"{self.name} 的备用浏览器已就绪")
+
+        self.spare_thread = threading.Thread(target=run, name=f"Spare-{self.name}", daemon=True)
+        self.spare_thread.start()
+
+    def take_spare(self):
+        """取出备用浏览器；仍在启动中时等待它完成，比重新冷启动更快"""
+        if self.spare_thread:
+            self.spare_thread.join()
+            self.spare_thread = None
+        with self.lock:
+            spare, self.spare = self.spare, None
+        if spare and not self.alive(spare[0]):
+            self.discard(spare[0])
+            return None
+        return spare
+
+    def alive(self, driver):
+        if driver in self.killed:
+            return False
+        try:
+            driver.current_window_handle
+            return True
+        except Exception:
+            return False
+
+    def ensure(self):
+        """返回可用的浏览器，当前浏览器已失效时切换到备用浏览器或重新启动"""
+        if self.driver and self.alive(self.driver):
+            return self.driver
+        if not self.is_active() or self.stop_event.is_set():
+            return None
+
+        if self.driver:
+            logging.warning(f"{self.name} 的浏览器已失效，重新启动")
+            self.discard(self.driver)
+            self.driver = None
+        freed_profile = self.profile
+        spare = self.take_spare() if self.keep_spare else None
+        if spare:
+            self.driver, self.profile = spare
+            logging.info(f"{self.name} 已切换到备用浏览器")
+        else:
+            self.driver = self.launch(freed_profile)
+        if self.driver and self.keep_spare:
+            # 原浏览器的用户目录已经释放，留给新的备用浏览器
+            self.prepare_spare(freed_profile if spare else self.other_profile(freed_profile))
+        return self.driver
+
+    def other_profile(self, profile):
+        return self.profiles[1] if profile == self.profiles[0] else self.profiles[0]
+
+    def discard(self, driver):
+        kill_browser(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self.lock:
+            self.killed.discard(driver)
+        if self.on_discard:
+            self.on_discard(driver)
+
+    def close(self):
+        self.stop_event.set()
+        if self.spare_thread:
+            self.spare_thread.join()
+            self.spare_thread = None
+        drivers = [self.driver] + ([self.spare[0]] if self.spare else [])
+        self.driver = None
+        self.spare = None
+        for driver in drivers:
+            if driver:
+                try:
+                    driver.quit()
+                except Exception:
+                    kill_browser(driver)
+                if self.on_discard:
+                    self.on_discard(driver)
@@ -0,0 +1,331 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import stat
+import subprocess
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Chrome 115 起ChromeDriver改由 Chrome for Testing 发布，下载地址和平台名称都不同
+CFT_FIRST_MAJOR = 115
+
+class Mirror:
+    """一个ChromeDriver下载源
+
+    version_url 返回与Chrome主版本匹配的驱动版本：listing为False时是 LATEST_RELEASE 纯文本，
+    为True时是npm镜像的目录列表（JSON数组，每项的name为版本号）。
+    download_url、checksum_url 和 verify_url 中可以使用 {version} 和 {platform}：
+    checksum_url 返回zip文件的SHA-256文本；verify_url 是Google Cloud Storage上的同一个文件，
+    只请求响应头，用其中 x-goog-hash 的MD5校验从镜像下载的文件（镜像本身不提供校验值）。
+    """
+
+    def __init__(self, name, version_url, download_url, listing=False, checksum_url=None, verify_url=None):
+        self.name = name
+        self.version_url = version_url
+        self.download_url = download_url
+        self.listing = listing
+        self.checksum_url = checksum_url
+        self.verify_url = verify_url
+
+    def locate(self, major, platform_name, timeout):
+        """查询与主版本匹配的驱动版本，返回 (版本号, 下载链接)"""
+        import requests
+        response = requests.get(self.version_url.format(major=major), timeout=timeout)
+        response.raise_for_status()
+        if self.listing:
+            versions = [
+                item['name'].strip('/') for item in response.json()
+                if item.get('name', '').split('.')[0] == str(major)
+            ]
+            if not versions:
+                raise ValueError(f"没有 {major} 版本的驱动")
+            version = max(versions, key=version_key)
+        else:
+            version = response.text.strip()
+            if not version.startswith(f"{major}."):
+                raise ValueError(f"返回的版本 {version[:40]} 与Chrome {major} 不匹配")
+        return version, self.download_url.format(version=version, platform=platform_name)
+
+    def expected_sha256(self, version, platform_name, timeout):
+        if not self.checksum_url:
+            return None
+        import requests
+        response = requests.get(self.checksum_url.format(version=version, platform=platform_name), timeout=timeout)
+        response.raise_for_status()
+        return response.text.split()[0].lower()
+
+    def expected_md5(self, version, platform_name, timeout):
+        if not self.verify_url:
+            return None
+        import requests
+        response = requests.head(self.verify_url.format(version=version, platform=platform_name), timeout=timeout)
+        response.raise_for_status()
+        return goog_md5(response.headers)
+
+# 官方下载源在Google Cloud Storage上，镜像下载的文件用官方文件响应头中的MD5校验
+CFT_STORAGE_URL = "https://storage.googleapis.com/chrome-for-testing-public/{version}/{platform}/chromedriver-{platform}.zip"
+LEGACY_STORAGE_URL = "https://chromedriver.storage.googleapis.com/{version}/chromedriver_{platform}.zip"
+
+MIRRORS = {
+    'cft': [
+        Mirror(
+            '淘宝镜像',
+            "https://registry.npmmirror.com/-/binary/chrome-for-testing/",
+            "https://registry.npmmirror.com/-/binary/chrome-for-testing/{version}/{platform}/chromedriver-{platform}.zip",
+            listing=True,
+            verify_url=CFT_STORAGE_URL
+        ),
+        Mirror(
+            '官方源',
+            "https://googlechromelabs.github.io/chrome-for-testing/LATEST_RELEASE_{major}",
+            CFT_STORAGE_URL
+        ),
+    ],
+    'legacy': [
+        Mirror(
+            '淘宝镜像',
+            "https://registry.npmmirror.com/-/binary/chromedriver/",
+            "https://registry.npmmirror.com/-/binary/chromedriver/{version}/chromedriver_{platform}.zip",
+            listing=True,
+            verify_url=LEGACY_STORAGE_URL
+        ),
+        Mirror(
+            '中科大镜像',
+            "https://mirrors.ustc.edu.cn/chromedriver/LATEST_RELEASE_{major}",
+            "https://mirrors.ustc.edu.cn/chromedriver/{version}/chromedriver_{platform}.zip",
+            verify_url=LEGACY_STORAGE_URL
+        ),
+        Mirror(
+            '官方源',
+            "https://chromedriver.storage.googleapis.com/LATEST_RELEASE_{major}",
+            LEGACY_STORAGE_URL
+        ),
+    ],
+}
+
+def version_key(version):
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+def default_cache_dir():
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'AliProductsImport', 'chromedriver')
+
+def driver_platform(major):
+    """当前系统在下载源中的平台名称"""
+    machine = platform.machine().lower()
+    arm = machine in ('arm64', 'aarch64')
+    if sys.platform.startswith('win'):
+        # 旧版驱动只发布32位版本，64位系统也可以使用
+        if major >= CFT_FIRST_MAJOR and machine.endswith('64'):
+            return 'win64'
+        return 'win32'
+    if sys.platform == 'darwin':
+        if major >= CFT_FIRST_MAJOR:
+            return 'mac-arm64' if arm else 'mac-x64'
+        return 'mac_arm64' if arm else 'mac64'
+    return 'linux64'
+
+def get_chrome_version():
+    """读取本机Chrome的版本号，支持Windows、Linux和macOS，找不到时返回None"""
+    if os.name == 'nt':
+        try:
+            import winreg
+            for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(root, r'Software\Google\Chrome\BLBeacon') as key:
+                        return winreg.QueryValueEx(key, 'version')[0]
+                except OSError:
+                    continue
+        except ImportError:
+            pass
+        try:
+            chrome_path = r'C:\Program Files\Google\Chrome\Application\chrome.exe'
+            if os.path.exists(chrome_path):
+                from win32com.client import Dispatch
+                parser = Dispatch('Scripting.FileSystemObject')
+                return parser.GetFileVersion(chrome_path)
+        except Exception as e:
+            logging.error(f"获取Chrome版本失败: {str(e)}")
+        return None
+
+    if sys.platform == 'darwin':
+        candidates = ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome']
+    else:
+        candidates = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser']
+    for command in candidates:
+        executable = command if os.path.isabs(command) else shutil.which(command)
+        if not executable or not os.path.exists(executable):
+            continue
+        try:
+            output = subprocess.run(
+                [executable, '--version'], capture_output=True, text=True, timeout=10
+            ).stdout
+        except Exception as e:
+            logging.warning(f"运行 {command} --version 失败: {str(e)}")
+            continue
+        match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+        if match:
+            return match.group(1)
+    logging.error("获取Chrome版本失败: 没有找到Chrome")
+    return None
+
+def driver_executable():
+    return 'chromedriver.exe' if os.name == 'nt' else 'chromedriver'
+
+def cached_driver(cache_dir, major, platform_name):
+    """缓存命中时返回驱动路径，只检查清单和文件大小，不需要联网"""
+    entry_dir = os.path.join(cache_dir, f"{major}-{platform_name}")
+    try:
+        with open(os.path.join(entry_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        path = os.path.join(entry_dir, driver_executable())
+        if os.path.getsize(path) == manifest['size']:
+            return path
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def race_mirrors(mirrors, major, platform_name, timeout):
+    """并发查询所有下载源，按响应先后依次返回 (下载源, 版本号, 下载链接)"""
+    pool = ThreadPoolExecutor(max_workers=len(mirrors), thread_name_prefix='DriverMirror')
+    try:
+        futures = {pool.submit(mirror.locate, major, platform_name, timeout): mirror for mirror in mirrors}
+        for future in as_completed(futures):
+            mirror = futures[future]
+            try:
+                version, url = future.result()
+            except Exception as e:
+                logging.warning(f"{mirror.name}查询失败: {str(e)}")
+                continue
+            yield mirror, version, url
+    finally:
+        # 已经拿到结果时不再等待较慢的下载源
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def goog_md5(headers):
+    """Google Cloud Storage 响应头 x-goog-hash 中的MD5，没有时返回None"""
+    goog_hash = dict(
+        part.strip().split('=', 1) for part in headers.get('x-goog-hash', '').split(',') if '=' in part
+    )
+    return base64.b64decode(goog_hash['md5']) if 'md5' in goog_hash else None
+
+def download_to(url, path, timeout):
+    """流式下载到文件，返回 (SHA-256, MD5, 是否已校验)
+
+    下载源在响应头中提供MD5时（Google Cloud Storage）直接校验，不一致时抛出 ValueError。
+    """
+    import requests
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with requests.get(url, stream=True, timeout=(timeout, 60)) as response:
+        response.raise_for_status()
+        expected = goog_md5(response.headers)
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+                sha256.update(chunk)
+                md5.update(chunk)
+    if expected and expected != md5.digest():
+        raise ValueError("MD5校验失败")
+    return sha256.hexdigest(), md5.digest(), expected is not None
+
+def verify_download(mirror, version, platform_name, timeout, sha256, md5):
+    """用下载源的SHA-256或官方文件的MD5校验下载的文件
+
+    校验值不一致时抛出 ValueError；校验通过返回True，没有可用的校验值（官方源无法访问）时返回False。
+    """
+    verified = False
+    for label, lookup, actual in (
+        ('SHA-256', mirror.expected_sha256, sha256),
+        ('MD5', mirror.expected_md5, md5),
+    ):
+        try:
+            expected = lookup(version, platform_name, timeout)
+        except Exception as e:
+            logging.warning(f"获取{mirror.name}的{label}校验值失败: {str(e)}")
+            continue
+        if expected is None:
+            continue
+        if expected != actual:
+            raise ValueError(f"{label}校验失败")
+        verified = True
+    return verified
+
+def install_driver(zip_path, entry_dir, manifest):
+    """解压出chromedriver可执行文件并写入清单，清单最后写入，保证缓存中只有完整的驱动"""
+    with zipfile.ZipFile(zip_path) as archive:
+        bad_member = archive.testzip()
+        if bad_member:
+            raise ValueError(f"压缩包损坏: {bad_member}")
+        members = [name for name in archive.namelist() if os.path.basename(name) == driver_executable()]
+        if not members:
+            raise ValueError("压缩包中没有chromedriver")
+        os.makedirs(entry_dir, exist_ok=True)
+        path = os.path.join(entry_dir, driver_executable())
+        with archive.open(members[0]) as source, open(path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+    if os.name != 'nt':
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    manifest['size'] = os.path.getsize(path)
+    with open(os.path.join(entry_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
+
+def resolve_chromedriver(cache_dir=None, mirrors=None, chrome_version=None, timeout=10):
+    """返回与本机Chrome匹配的ChromeDriver路径
+
+    按Chrome主版本和平台缓存在本地，命中时直接返回；未命中时并发查询所有下载源，
+    从最先响应的下载源流式下载并校验，失败时换下一个已响应的下载源。
+    mirrors 可以替换为本地的模拟下载源，用于测试。
+    """
+    chrome_version = chrome_version or get_chrome_version()
+    if not chrome_version:
+        return None
+    major = int(chrome_version.split('.')[0])
+    platform_name = driver_platform(major)
+    cache_dir = cache_dir or default_cache_dir()
+
+    path = cached_driver(cache_dir, major, platform_name)
+    if path:
+        logging.info(f"使用缓存的ChromeDriver: {path}")
+        return path
+
+    if mirrors is None:
+        mirrors = MIRRORS['cft' if major >= CFT_FIRST_MAJOR else 'legacy']
+    entry_dir = os.path.join(cache_dir, f"{major}-{platform_name}")
+    os.makedirs(cache_dir, exist_ok=True)
+    zip_path = os.path.join(cache_dir, f"{major}-{platform_name}.zip.part")
+    try:
+        for mirror, version, url in race_mirrors(mirrors, major, platform_name, timeout):
+            try:
+                logging.info(f"从{mirror.name}下载 ChromeDriver {version}")
+                sha256, md5, verified = download_to(url, zip_path, timeout)
+                verified = verified or verify_download(mirror, version, platform_name, timeout, sha256, md5)
+                if not verified:
+                    logging.warning(f"{mirror.name}没有可用的校验值，ChromeDriver {version} 未经校验")
+                path = install_driver(zip_path, entry_dir, {
+                    'chrome_version': chrome_version,
+                    'driver_version': version,
+                    'platform': platform_name,
+                    'source': mirror.name,
+                    'sha256': sha256,
+                    'verified': verified,
+                })
+                logging.info(f"ChromeDriver {version} 已缓存到 {path}")
+                return path
+            except Exception as e:
+                logging.warning(f"{mirror.name}下载失败: {str(e)}")
+        logging.error("所有镜像源下载失败")
+        return None
+    finally:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
@@ -0,0 +1,623 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from utils import (
+    harvest_product_urls,
+    import_product,
+    set_variant_policy,
+    set_search_options,
+    set_browser_options,
+    set_target_collections,
+    SEARCH_OPTIONS,
+    CollectionNotFoundError
+)
+from job_planner import plan_import_jobs, JobPlan, ImportJob
+from product_index import ProductIndex, product_id_from_url
+from browser_supervisor import BrowserSupervisor, kill_browser
+from chromedriver_cache import resolve_chromedriver
+from run_control import RunControl, StopRequested, activate_control, SHUTDOWN_DEADLINE
+from run_journal import RunJournal
+from waits import set_wait_floor, wait_ledger
+from timeouts import timeouts, set_adaptive_timeouts
+from tracing import enable_tracing, disable_tracing
+from log_pipeline import log_context, bind_log_context
+
+# 导入设置的默认值，GUI（QSettings）和命令行使用相同的键
+DEFAULT_SETTINGS = {
+    'driver_path': '',
+    'auto_download': True,
+    'user_data_dir': '',
+    'worker_count': 1,
+    'queue_size': 50,
+    'wait_floor': 0.2,
+    'adaptive_timeouts': True,
+    'timeout_safety': 3.0,
+    'trace_enabled': False,
+    'search_mode': 'url',
+    'search_sort': '',
+    'verified_supplier': False,
+    'search_extra_params': '',
+    'target_products': 0,
+    'variant_policy': 'first',
+    'variant_count': 1,
+    'variant_price_min': 0.0,
+    'variant_price_max': 0.0,
+    'lean_mode': False,
+    'headless': True,
+    'blocked_types': 'image,font,media,tracker',
+    'blocked_patterns': '',
+    'keep_spare_browser': False,
+    'command_deadline': 90,
+}
+
+def normalize_settings(values=None):
+    """补全默认值并按默认值的类型转换（QSettings在部分平台上把所有值存为字符串）"""
+    settings = dict(DEFAULT_SETTINGS)
+    for key, value in (values or {}).items():
+        if key not in DEFAULT_SETTINGS or value is None:
+            continue
+        default = DEFAULT_SETTINGS[key]
+        if isinstance(default, bool):
+            value = value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes', 'on')
+        elif isinstance(default, int):
+            value = int(float(value))
+        elif isinstance(default, float):
+            value = float(value)
+        else:
+            value = str(value)
+        settings[key] = value
+    return settings
+
+class RunStats:
+    """一次导入任务的统计结果"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.completed = 0
+        self.outcomes = {}
+        self.started = None
+        self.elapsed = 0.0
+        self.stopped = False
+
+    def count(self, outcome):
+        with self.lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    @property
+    def imported(self):
+        return self.outcomes.get('imported', 0)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'total': self.total,
+                'completed': self.completed,
+                'outcomes': dict(self.outcomes),
+                'elapsed': self.elapsed,
+                'stopped': self.stopped,
+            }
+
+class ImportEngine:
+    """不依赖Qt的导入引擎：一个搜索线程加多个导入线程处理任务列表
+
+    jobs 可以是关键词文件路径（Excel/CSV/TXT/JSONL）、JobPlan，或 (关键词, 目标分类) 列表；settings 使用 DEFAULT_SETTINGS 中的键。
+    listener(event, **fields) 接收 total / progress / product / done 事件。
+    run() 阻塞执行并返回 RunStats；也可以用 events() 迭代事件，或在asyncio中 await run_async()。
+    """
+
+    def __init__(self, jobs, settings=None, resume_state=None, listener=None):
+        if isinstance(jobs, str):
+            self.workbook = jobs
+            self.plan = None
+        else:
+            self.workbook = resume_state.workbook if resume_state else ''
+            self.plan = jobs if isinstance(jobs, JobPlan) else JobPlan([ImportJob(*job) for job in jobs], [])
+        self.settings = normalize_settings(settings)
+        self.resume_state = resume_state
+        self.listeners = [listener] if listener else []
+        self.control = RunControl()
+        self.stats = RunStats()
+        self.drivers = []
+        self.state_lock = threading.Lock()
+        self.completed = 0
+        self.pending_products = {}
+        self.harvested_categories = set()
+        self.active_importers = 0
+        self.jobs = []
+        self.product_index = None
+        self.journal = None
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, event, **fields):
+        for listener in self.listeners:
+            try:
+                listener(event, **fields)
+            except Exception as e:
+                logging.error(f"处理导入事件 {event} 出错: {str(e)}")
+
+    @property
+    def is_running(self):
+        return not self.control.is_stopped
+
+    @property
+    def is_paused(self):
+        return self.control.is_paused
+
+    def stop(self):
+        """请求停止：各工作者在下一个检查点退出，run() 负责等待和清理"""
+        self.control.stop()
+
+    def pause(self):
+        # 各工作者在当前阶段结束后暂停
+        self.control.pause()
+        logging.info("导入任务已暂停")
+
+    def resume(self):
+        self.control.resume()
+        logging.info("导入任务继续进行")
+
+    def kill_browsers(self):
+        """强制结束所有浏览器进程，卡住的WebDriver命令会立即返回"""
+        with self.state_lock:
+            drivers = list(self.drivers)
+        for driver in drivers:
+            kill_browser(driver)
+
+    def join_threads(self, threads):
+        """等待工作线程结束；停止后最多等待 SHUTDOWN_DEADLINE 秒，超时则强制结束浏览器"""
+        deadline = None
+        while any(thread.is_alive() for thread in threads):
+            if self.control.is_stopped and deadline is None:
+                deadline = time.monotonic() + SHUTDOWN_DEADLINE
+                logging.info("正在停止导入任务，等待当前产品处理完成...")
+            if deadline is not None and time.monotonic() >= deadline:
+                logging.warning(f"工作者 {SHUTDOWN_DEADLINE} 秒内没有停止，强制结束浏览器")
+                self.kill_browsers()
+                for thread in threads:
+                    thread.join(5)
+                break
+            for thread in threads:
+                thread.join(0.2)
+
+    def open_worker_browser(self, worker_id, driver_path, user_data_dir):
+        """为工作者创建受监管的浏览器，浏览器卡死或崩溃时自动用相同设置重新启动
+
+        返回监管器，浏览器无法启动时返回None。
+        """
+        supervisor = BrowserSupervisor(
+            f"工作者 {worker_id}", driver_path, user_data_dir, worker_id,
+            keep_spare=self.settings['keep_spare_browser'],
+            command_deadline=self.settings['command_deadline'],
+            on_launch=self.track_browser,
+            on_discard=self.untrack_browser,
+            is_active=lambda: self.is_running
+        )
+        if not supervisor.start():
+            supervisor.close()
+            return None
+        return supervisor
+
+    def track_browser(self, driver):
+        with self.state_lock:
+            self.drivers.append(driver)
+
+    def untrack_browser(self, driver):
+        with self.state_lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+
+    def release_browser(self, supervisor):
+        supervisor.close()
+
+    def mark_category_done(self, index):
+        """汇总各工作者的进度"""
+        if self.journal:
+            keyword, collection = self.jobs[index]
+            self.journal.record('category_done', index=index, keyword=keyword, collection=collection)
+        with self.state_lock:
+            self.completed += 1
+            completed = self.completed
+        self.emit('progress', completed=completed, total=self.stats.total)
+
+    def finish_product(self, index, product_url=None, outcome=None):
+        """导入阶段处理完一个产品后调用，类别的全部产品完成时更新进度"""
+        if outcome and self.journal:
+            self.journal.record('product', index=index, url=product_url, outcome=outcome)
+        if outcome:
+            self.stats.count(outcome)
+            self.emit('product', index=index, url=product_url, outcome=outcome)
+        with self.state_lock:
+            self.pending_products[index] -= 1
+            done = self.pending_products[index] == 0 and index in self.harvested_categories
+        if done:
+            self.mark_category_done(index)
+
+    def put_product(self, task_queue, item):
+        """向有界队列放入产品，队列满时等待导入阶段消费"""
+        while self.is_running and self.active_importers > 0:
+            try:
+                task_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run_harvester(self, task_queue, jobs, driver_path, importer_count):
+        """搜索阶段：依次搜索每个关键词，把产品链接和目标分类放入有界队列"""
+        bind_log_context(worker='harvester')
+        supervisor = None
+        try:
+            for index, (category, collection) in enumerate(jobs):
+                bind_log_context(category=category, collection=collection)
+                if not self.control.wait_if_paused() or self.active_importers == 0:
+                    break
+
+                resume_state = self.resume_state
+                if resume_state and resume_state.is_done(index, category, collection):
+                    self.mark_category_done(index)
+                    continue
+
+                products = resume_state.pending_products(index, category, collection) if resume_state else None
+                if products is not None:
+                    logging.info(f"从任务日志恢复类别: {category}，剩余 {len(products)} 个产品")
+                else:
+                    if not supervisor:
+                        # 搜索不依赖Importify插件和登录状态，使用独立的临时用户目录
+                        supervisor = self.open_worker_browser('harvester', driver_path, None)
+                        if not supervisor:
+                            logging.error("搜索浏览器无法启动，退出")
+                            return
+                    driver = supervisor.ensure()
+                    if not driver:
+                        logging.error("搜索浏览器无法重新启动，退出")
+                        return
+
+                    logging.info(f"开始搜索类别: {category}")
+                    products = self.harvest(driver, index, category, collection)
+
+                # 每搜索到一个产品立即放入队列，导入工作者不用等整个关键词的所有页搜索完
+                count = 0
+                skipped = 0
+                queued = True
+                try:
+                    for product_title, product_url in products:
+                        # 已导入或其他关键词已领取的产品不进入导入队列
+                        if not self.product_index.claim(product_id_from_url(product_url)):
+                            skipped += 1
+                            self.journal.record('product', index=index, url=product_url, outcome='skipped')
+                            self.stats.count('skipped')
+                            continue
+                        with self.state_lock:
+                            self.pending_products[index] = self.pending_products.get(index, 0) + 1
+                        if not self.put_product(task_queue, (index, category, collection, product_title, product_url)):
+                            self.finish_product(index)
+                            queued = False
+                            break
+                        count += 1
+                except StopRequested:
+                    queued = False
+                except Exception as e:
+                    logging.error(f"搜索类别 '{category}' 出错: {str(e)}")
+
+                if not queued:
+                    # 任务已停止：这个类别没有处理完，不标记完成，继续任务时重新处理
+                    break
+
+                logging.info(f"类别 '{category}' 收集到 {count} 个产品，跳过 {skipped} 个已导入产品")
+                with self.state_lock:
+                    self.harvested_categories.add(index)
+                    done = self.pending_products.get(index, 0) == 0
+                if done:
+                    self.mark_category_done(index)
+        finally:
+            if supervisor:
+                self.release_browser(supervisor)
+            # 通知所有导入工作者队列已结束
+            for _ in range(importer_count):
+                self.put_product(task_queue, None)
+
+    def harvest(self, driver, index, category, collection):
+        """边搜索边产出产品，每一页写一条 harvested 记录，全部搜索完成后写 harvest_done"""
+        def on_page(page, products):
+            self.journal.record(
+                'harvested', index=index, keyword=category, collection=collection, page=page, products=products
+            )
+
+        yield from harvest_product_urls(driver, category, on_page=on_page)
+        self.journal.record('harvest_done', index=index, keyword=category, collection=collection)
+
+    def run_import_worker(self, worker_id, task_queue, driver_path, user_data_dir):
+        """导入阶段：从共享队列中领取产品并导入"""
+        bind_log_context(worker=worker_id)
+        supervisor = self.open_worker_browser(worker_id, driver_path, user_data_dir)
+        if not supervisor:
+            logging.error(f"工作者 {worker_id} 无法启动浏览器，退出")
+            with self.state_lock:
+                self.active_importers -= 1
+            return
+
+        try:
+            while self.control.wait_if_paused():
+
+                try:
+                    item = task_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+
+                index, category, collection, product_title, product_url = item
+                product_context = log_context(
+                    category=category, collection=collection,
+                    product_id=product_id_from_url(product_url), product_url=product_url
+                )
+                with product_context:
+                    outcome = 'failed'
+                    try:
+                        driver = supervisor.ensure()
+                        if not driver:
+                            raise Exception("浏览器无法重新启动")
+                        outcome = import_product(
+                            driver, product_title, product_url, category, collection, self.product_index
+                        )
+                    except StopRequested:
+                        break
+                    except CollectionNotFoundError as e:
+                        # 目标分类写错时每个产品都会失败，直接停止整个任务
+                        logging.error(f"{str(e)}，请检查Excel工作表名称，导入任务已停止")
+                        self.control.stop()
+                    except Exception as e:
+                        logging.error(f"工作者 {worker_id} 处理产品出错: {str(e)}")
+                    finally:
+                        # 被停止打断的产品不记录结果，继续任务时会重新处理
+                        self.finish_product(index, product_url, outcome if self.is_running else None)
+        except Exception as e:
+            logging.error(f"工作者 {worker_id} 出错: {str(e)}")
+        finally:
+            with self.state_lock:
+                self.active_importers -= 1
+            self.release_browser(supervisor)
+
+    def apply_settings(self):
+        """把设置应用到导入流程的各个模块，返回ChromeDriver路径"""
+        settings = self.settings
+        driver_path = settings['driver_path']
+        if settings['auto_download']:
+            # 命中本地缓存时立即返回，否则并发查询各镜像源下载
+            driver_path = resolve_chromedriver() or driver_path
+        set_wait_floor(settings['wait_floor'])
+        wait_ledger.reset()
+        # 各等待点的超时按之前运行记录的实际耗时校准
+        set_adaptive_timeouts(settings['adaptive_timeouts'], settings['timeout_safety'])
+        timeouts.load()
+        set_search_options(
+            settings['search_mode'],
+            settings['search_sort'],
+            settings['verified_supplier'],
+            settings['search_extra_params'],
+            settings['target_products']
+        )
+        set_variant_policy(
+            settings['variant_policy'],
+            settings['variant_count'],
+            settings['variant_price_min'] or None,
+            settings['variant_price_max'] or None
+        )
+        set_browser_options(
+            settings['lean_mode'],
+            settings['headless'],
+            [t for t in settings['blocked_types'].split(',') if t],
+            settings['blocked_patterns'].split(',')
+        )
+        if settings['trace_enabled']:
+            trace_path = os.path.join('logs', f"trace_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+            enable_tracing(trace_path)
+            logging.info(f"阶段耗时追踪已开启: {trace_path}")
+        return driver_path
+
+    def run(self):
+        """执行导入任务直到完成或被停止，返回 RunStats"""
+        self.stats.started = time.monotonic()
+        try:
+            if not self.is_running:
+                return self.stats
+            # 导入流程中的检查点响应本任务的暂停和停止
+            activate_control(self.control)
+
+            driver_path = self.apply_settings()
+            user_data_dir = self.settings['user_data_dir']
+            worker_count = max(1, self.settings['worker_count'])
+            queue_size = max(1, self.settings['queue_size'])
+
+            # 一次读取全部工作表，每个关键词导入到所在工作表对应的分类
+            plan = self.plan or plan_import_jobs(self.workbook)
+            
+            if not self.is_running:
+                return self.stats
+                
+            if not plan.jobs:
+                logging.error("没有找到有效的数据")
+                return self.stats
+                
+            set_target_collections(plan.collections)
+            self.jobs = plan.jobs
+            total = len(plan.jobs)
+            self.stats.total = total
+            self.emit('total', total=total)
+            logging.info(plan.summary(SEARCH_OPTIONS['target_products'], worker_count))
+
+            # 有界队列：搜索阶段领先导入阶段最多 queue_size 个产品，内存占用保持平稳
+            task_queue = queue.Queue(maxsize=queue_size)
+            self.pending_products = {}
+            self.harvested_categories = set()
+            self.active_importers = worker_count
+            self.product_index = ProductIndex()
+            self.journal = RunJournal()
+            self.journal.start(self.workbook, total, resume=self.resume_state is not None)
+            if self.resume_state:
+                logging.info(f"继续上次中断的任务，已完成 {len(self.resume_state.done_categories)}/{total} 个类别")
+            logging.info(f"已导入产品索引中有 {self.product_index.count()} 个产品")
+            logging.info(f"启动 1 个搜索浏览器和 {worker_count} 个导入浏览器")
+
+            threads = [threading.Thread(
+                target=self.run_harvester,
+                args=(task_queue, plan.jobs, driver_path, worker_count),
+                name="ImportHarvester",
+                daemon=True
+            )]
+            for worker_id in range(worker_count):
+                threads.append(threading.Thread(
+                    target=self.run_import_worker,
+                    args=(worker_id, task_queue, driver_path, user_data_dir),
+                    name=f"ImportWorker-{worker_id}",
+                    daemon=True
+                ))
+            for thread in threads:
+                thread.start()
+
+            self.join_threads(threads)
+
+            logging.info(f"总共成功导入的产品数量：{self.stats.imported}")
+            logging.info(wait_ledger.report())
+            logging.info(timeouts.report())
+            # 只有全部类别处理完才标记任务结束，否则保留日志以便继续
+            self.journal.close(finished=self.is_running and self.completed == total)
+            self.journal = None
+            if not self.is_running:
+                logging.info("导入任务已停止，进度已保存，可以点击\"继续上次导入\"继续")
+
+        except Exception as e:
+            logging.error(f"导入过程出错: {str(e)}")
+        finally:
+            if self.journal:
+                self.journal.close()
+            if self.product_index:
+                self.product_index.close()
+            # 正常情况下各工作者已经关闭了自己的浏览器，这里确保没有残留的Chrome进程
+            self.kill_browsers()
+            disable_tracing()
+            timeouts.save()
+            self.stats.completed = self.completed
+            self.stats.stopped = self.control.is_stopped
+            self.stats.elapsed = time.monotonic() - self.stats.started
+            self.emit('done', stats=self.stats)
+        return self.stats
+
+    def events(self):
+        """在后台线程中运行，逐个产出 (事件, 字段) 直到 done 事件"""
+        events = queue.SimpleQueue()
+        self.add_listener(lambda event, **fields: events.put((event, fields)))
+        thread = threading.Thread(target=self.run, name="ImportEngine", daemon=True)
+        thread.start()
+        while True:
+            # 带超时等待，主线程中使用时 Ctrl+C 可以及时响应
+            try:
+                event, fields = events.get(timeout=1)
+            except queue.Empty:
+                continue
+            yield event, fields
+            if event == 'done':
+                break
+        thread.join()
+
+    async def run_async(self):
+        """在线程池中运行，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.run)
+
+def parse_setting(text):
+    """解析命令行中的 键=值"""
+    key, sep, value = text.partition('=')
+    if not sep or key not in DEFAULT_SETTINGS:
+        raise ValueError(f"未知的设置: {text}（可用: {', '.join(DEFAULT_SETTINGS)}）")
+    return key, value
+
+def main(argv=None):
+    import argparse
+    import json
+    import signal
+    from log_pipeline import setup_logging
+    from run_journal import load_resume_state
+
+    parser = argparse.ArgumentParser(
+        prog='python -m import_engine',
+        description="不启动界面，在命令行中执行导入任务（适合无显示器的服务器）"
+    )
+    parser.add_argument('workbook', nargs='?', help="Excel工作簿（每个工作表名称是目标分类），或CSV/TXT/JSONL关键词文件")
+    parser.add_argument('--resume', action='store_true', help="继续上次中断的任务")
+    parser.add_argument('--settings', help="JSON格式的设置文件，键与界面设置相同")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help="单项设置，可以多次指定")
+    parser.add_argument('--driver', help="ChromeDriver路径（指定后不再自动下载）")
+    parser.add_argument('--user-data-dir', help="Chrome用户数据目录（需要已安装Importify插件并登录）")
+    parser.add_argument('--workers', type=int, help="并行导入浏览器数量")
+    parser.add_argument('--lean', action='store_true', help="精简模式：无头运行并屏蔽图片等资源")
+    parser.add_argument('--json', help="把统计结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    values = {}
+    if args.settings:
+        with open(args.settings, 'r', encoding='utf-8') as f:
+            values.update(json.load(f))
+    try:
+        values.update(parse_setting(item) for item in args.set)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.driver:
+        values.update(driver_path=args.driver, auto_download=False)
+    if args.user_data_dir:
+        values['user_data_dir'] = args.user_data_dir
+    if args.workers:
+        values['worker_count'] = args.workers
+    if args.lean:
+        values.update(lean_mode=True, headless=True)
+
+    resume_state = None
+    if args.resume:
+        resume_state = load_resume_state()
+        if not resume_state:
+            parser.error("没有可以继续的导入任务")
+        workbook = resume_state.workbook
+    elif args.workbook:
+        workbook = args.workbook
+    else:
+        parser.error("请指定Excel工作簿或使用 --resume")
+
+    setup_logging()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s || %(levelname)s || %(message)s'))
+    logging.getLogger().addHandler(console)
+    logging.getLogger().setLevel(logging.INFO)
+
+    engine = ImportEngine(workbook, values, resume_state)
+
+    def on_signal(signum, frame):
+        logging.info("收到停止信号，正在保存进度...")
+        engine.stop()
+
+    signal.signal(signal.SIGINT, on_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, on_signal)
+
+    # 在主线程中消费事件，保证信号处理函数可以及时执行
+    stats = None
+    for event, fields in engine.events():
+        if event == 'progress':
+            logging.info(f"进度: {fields['completed']}/{fields['total']} 个关键词")
+        elif event == 'done':
+            stats = fields['stats']
+
+    result = stats.as_dict()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 1 if stats.stopped else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
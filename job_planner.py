@@ -0,0 +1,84 @@
+import logging
+from collections import namedtuple
+from keyword_sources import iter_unique_keywords
+
+# 搜索结果第一页的产品数量，未设置目标产品数时用于估算
+PRODUCTS_PER_PAGE = 48
+
+# 单个产品的平均导入耗时（秒），用于估算任务时长
+SECONDS_PER_PRODUCT = 20
+
+# 一个导入任务：搜索关键词和导入的目标分类（工作表名称）
+ImportJob = namedtuple('ImportJob', ['keyword', 'collection'])
+
+# 日志中逐条列出的重复关键词数量上限，其余只计数
+DUPLICATE_LOG_LIMIT = 100
+
+class JobPlan:
+    """工作簿中全部工作表的导入任务列表
+
+    jobs             去重后的 (关键词, 目标分类) 列表，顺序与工作簿一致
+    duplicates       被去掉的重复关键词 (关键词, 工作表, 首次出现的工作表)，最多记录 DUPLICATE_LOG_LIMIT 个
+    duplicate_count  被去掉的重复关键词总数
+    """
+
+    def __init__(self, jobs, duplicates, duplicate_count=None):
+        self.jobs = jobs
+        self.duplicates = duplicates
+        self.duplicate_count = len(duplicates) if duplicate_count is None else duplicate_count
+
+    def __len__(self):
+        return len(self.jobs)
+
+    @property
+    def collections(self):
+        """任务涉及的全部目标分类，按首次出现的顺序"""
+        return list(dict.fromkeys(job.collection for job in self.jobs))
+
+    def estimate(self, products_per_keyword=0, workers=1, seconds_per_product=SECONDS_PER_PRODUCT):
+        """估算任务规模，返回 (产品数量, 预计秒数)"""
+        products = len(self.jobs) * (products_per_keyword or PRODUCTS_PER_PAGE)
+        return products, products * seconds_per_product / max(1, workers)
+
+    def summary(self, products_per_keyword=0, workers=1):
+        products, seconds = self.estimate(products_per_keyword, workers)
+        per_collection = {}
+        for job in self.jobs:
+            per_collection[job.collection] = per_collection.get(job.collection, 0) + 1
+        lines = [
+            f"共 {len(self.jobs)} 个关键词，{len(per_collection)} 个目标分类，"
+            f"去掉重复关键词 {self.duplicate_count} 个",
+            f"预计约 {products} 个产品，{workers} 个浏览器约需 {seconds / 3600:.1f} 小时",
+        ]
+        lines.extend(f"  {collection}: {count} 个关键词" for collection, count in per_collection.items())
+        return "\n".join(lines)
+
+def plan_import_jobs(file_path):
+    """逐行读取关键词文件，生成导入任务列表
+
+    Excel工作簿中每个工作表第一列的每个单元格是一个关键词，工作表名称是目标分类；
+    也支持CSV、TXT和JSONL（见 keyword_sources）。读取是流式的，不需要把整个工作表载入内存。
+    同一关键词出现多次时只保留第一次：搜索结果相同，
+    后面的产品都会被产品索引跳过，重复搜索没有意义。
+    读取失败时返回空的任务列表。
+    """
+    duplicates = []
+    duplicate_count = 0
+
+    def on_duplicate(keyword, collection, first_collection):
+        nonlocal duplicate_count
+        duplicate_count += 1
+        if len(duplicates) < DUPLICATE_LOG_LIMIT:
+            duplicates.append((keyword, collection, first_collection))
+
+    try:
+        jobs = [ImportJob(keyword, collection) for keyword, collection in iter_unique_keywords(file_path, on_duplicate)]
+    except Exception as e:
+        logging.error(f"读取关键词文件时出错: {str(e)}")
+        return JobPlan([], [])
+
+    for keyword, collection, first_collection in duplicates:
+        logging.info(f"关键词 '{keyword}'（{collection}）与 {first_collection} 中的关键词重复，已跳过")
+    if duplicate_count > len(duplicates):
+        logging.info(f"另有 {duplicate_count - len(duplicates)} 个重复关键词已跳过")
+    return JobPlan(jobs, duplicates, duplicate_count)
@@ -0,0 +1,155 @@
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import os
+
+# 支持的关键词文件类型
+KEYWORD_FILE_TYPES = ('.xlsx', '.xlsm', '.xls', '.csv', '.txt', '.jsonl')
+
+# 文件对话框中的过滤条件
+KEYWORD_FILE_FILTER = "关键词文件 (*.xlsx *.xlsm *.xls *.csv *.txt *.jsonl);;Excel Files (*.xlsx *.xls)"
+
+# CSV第一行是这些表头时跳过
+CSV_HEADERS = ('keyword', 'keywords', '关键词', '产品类别')
+
+def normalize_keyword(keyword):
+    return ' '.join(str(keyword).split()).lower()
+
+def default_collection(path):
+    """没有工作表的文件（CSV/TXT/JSONL）默认导入到与文件名同名的分类"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+def detect_encoding(path):
+    """根据BOM和文件开头判断文本编码：UTF-8（含BOM）、UTF-16，否则按GBK读取（中文Excel另存的CSV）"""
+    with open(path, 'rb') as f:
+        head = f.read(65536)
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'gbk'
+
+def clean_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def iter_xlsx(path):
+    """逐行读取每个工作表第一列，不把整个工作表载入内存"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for (value,) in sheet.iter_rows(min_col=1, max_col=1, values_only=True):
+                yield clean_cell(value), sheet.title
+    finally:
+        workbook.close()
+
+def iter_xls(path):
+    """旧版 .xls 只能通过pandas（xlrd）读取"""
+    import pandas as pd
+    for sheet_name, df in pd.read_excel(path, sheet_name=None, header=None).items():
+        if df.empty:
+            continue
+        for value in df.iloc[:, 0].dropna().tolist():
+            yield clean_cell(value), str(sheet_name)
+
+def iter_csv(path):
+    """第一列是关键词，第二列（可选）是目标分类"""
+    collection = default_collection(path)
+    with open(path, 'r', encoding=detect_encoding(path), newline='') as f:
+        for line_number, row in enumerate(csv.reader(f)):
+            if not row:
+                continue
+            if line_number == 0 and row[0].strip().lower() in CSV_HEADERS:
+                continue
+            target = row[1].strip() if len(row) > 1 and row[1].strip() else collection
+            yield row[0].strip(), target
+
+def iter_txt(path):
+    """每行一个关键词"""
+    collection = default_collection(path)
+    with open(path, 'r', encoding=detect_encoding(path)) as f:
+        for line in f:
+            yield line.strip(), collection
+
+def iter_jsonl(path):
+    """每行是关键词字符串，或 {"keyword": ..., "collection": ...}"""
+    collection = default_collection(path)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                logging.warning(f"{path} 第 {line_number} 行不是有效的JSON，已跳过")
+                continue
+            if isinstance(item, dict):
+                yield clean_cell(item.get('keyword')), clean_cell(item.get('collection')) or collection
+            else:
+                yield clean_cell(item), collection
+
+READERS = {
+    '.xlsx': iter_xlsx,
+    '.xlsm': iter_xlsx,
+    '.xls': iter_xls,
+    '.csv': iter_csv,
+    '.txt': iter_txt,
+    '.jsonl': iter_jsonl,
+}
+
+def iter_keywords(path):
+    """按文件类型逐个产出 (关键词, 目标分类)，跳过空白关键词"""
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension)
+    if not reader:
+        raise ValueError(f"不支持的文件类型: {extension}（支持 {', '.join(KEYWORD_FILE_TYPES)}）")
+    # 同一个目标分类只保留一个字符串对象，百万行的CSV不会为每行复制一份分类名称
+    collections = {}
+    for keyword, collection in reader(path):
+        if keyword:
+            yield keyword, collections.setdefault(collection, collection)
+
+class KeywordDeduper:
+    """关键词去重，只保存规范化关键词的8字节摘要，不保存关键词本身
+
+    seen(keyword, collection) 第一次出现时返回None，重复时返回首次出现的目标分类。
+    目标分类只有少数几个，每个摘要只记录分类的编号。
+    """
+
+    def __init__(self):
+        self.first_collection = {}
+        self.collections = []
+        self.collection_ids = {}
+
+    def seen(self, keyword, collection):
+        key = hashlib.blake2b(normalize_keyword(keyword).encode('utf-8'), digest_size=8).digest()
+        collection_id = self.first_collection.get(key)
+        if collection_id is not None:
+            return self.collections[collection_id]
+        if collection not in self.collection_ids:
+            self.collection_ids[collection] = len(self.collections)
+            self.collections.append(collection)
+        self.first_collection[key] = self.collection_ids[collection]
+        return None
+
+def iter_unique_keywords(path, on_duplicate=None):
+    """逐个产出去重后的 (关键词, 目标分类)
+
+    同一关键词再次出现时跳过，并调用 on_duplicate(关键词, 目标分类, 首次出现的目标分类)。
+    """
+    deduper = KeywordDeduper()
+    for keyword, collection in iter_keywords(path):
+        first_collection = deduper.seen(keyword, collection)
+        if first_collection is None:
+            yield keyword, collection
+        elif on_duplicate:
+            on_duplicate(keyword, collection, first_collection)
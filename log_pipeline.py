@@ -0,0 +1,162 @@
+import atexit
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+
+# 单个日志文件的大小上限，超过后轮转并压缩
+LOG_MAX_BYTES = 20 * 1024 * 1024
+
+# 每次运行保留的轮转文件数量
+LOG_BACKUP_COUNT = 5
+
+# logs目录中保留最近多少次运行的日志，更早的删除
+LOG_KEEP_RUNS = 30
+
+TEXT_FORMAT = '%(asctime)s || %(levelname)s || %(message)s'
+
+# 写入JSONL日志的关联字段，通过 log_context 设置
+CONTEXT_FIELDS = ('worker', 'category', 'collection', 'product_id', 'product_url')
+
+context = threading.local()
+
+class log_context:
+    """为当前线程中的日志附加关联字段（工作者、关键词、产品ID等），写入结构化日志"""
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(context, 'fields', {})
+        context.fields = dict(self.previous, **self.fields)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        context.fields = self.previous
+        return False
+
+def bind_log_context(**fields):
+    """为当前线程之后的全部日志设置关联字段（例如工作者编号）"""
+    context.fields = dict(getattr(context, 'fields', {}), **fields)
+
+class ContextFilter(logging.Filter):
+    """在产生日志的线程中读取关联字段，放入日志记录（必须加在QueueHandler上）"""
+
+    def filter(self, record):
+        record.context = dict(getattr(context, 'fields', {}))
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in getattr(record, 'context', {}).items():
+            if key in CONTEXT_FIELDS and value is not None:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def gzip_rotator(source, dest):
+    """轮转时把旧文件压缩成 .gz"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def rotating_handler(path, formatter):
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    handler.namer = lambda name: name + '.gz'
+    handler.rotator = gzip_rotator
+    handler.setFormatter(formatter)
+    return handler
+
+def compress_old_logs(log_dir, current_stamp, keep_runs=LOG_KEEP_RUNS):
+    """压缩之前运行留下的日志，并删除超出保留次数的旧日志"""
+    runs = {}
+    for path in glob.glob(os.path.join(log_dir, 'alibaba_import_*')):
+        stamp = os.path.basename(path)[len('alibaba_import_'):].split('.')[0]
+        if stamp != current_stamp:
+            runs.setdefault(stamp, []).append(path)
+    stamps = sorted(runs)
+    for stamp in stamps[:-keep_runs] if keep_runs else stamps:
+        for path in runs.pop(stamp):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"删除旧日志失败: {str(e)}")
+    for paths in runs.values():
+        for path in paths:
+            if path.endswith('.gz'):
+                continue
+            try:
+                gzip_rotator(path, path + '.gz')
+            except OSError as e:
+                logging.warning(f"压缩旧日志失败: {str(e)}")
+
+def setup_logging(log_dir='logs'):
+    """配置异步日志管道，返回本次运行的文本日志路径
+
+    所有线程的日志只放入内存队列（QueueHandler），由后台的QueueListener写入
+    文本日志 alibaba_import_<时间>.log 和结构化日志 alibaba_import_<时间>.jsonl，
+    导入线程不会因为写盘而阻塞。两个文件超过大小上限时轮转并压缩。
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    text_path = os.path.join(log_dir, f"alibaba_import_{stamp}.log")
+    json_path = os.path.join(log_dir, f"alibaba_import_{stamp}.jsonl")
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    listener = logging.handlers.QueueListener(
+        log_queue,
+        rotating_handler(text_path, logging.Formatter(TEXT_FORMAT)),
+        rotating_handler(json_path, JsonFormatter()),
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    logging.getLogger().addHandler(queue_handler)
+
+    threading.Thread(
+        target=compress_old_logs, args=(log_dir, stamp), name="LogCleanup", daemon=True
+    ).start()
+    return text_path
+
+def log_files(path):
+    """日志文件及其轮转后的压缩文件，按时间从早到晚排列"""
+    backups = []
+    for i in range(LOG_BACKUP_COUNT, 0, -1):
+        backup = f"{path}.{i}.gz"
+        if os.path.exists(backup):
+            backups.append(backup)
+    return backups + [path]
+
+def search_log_file(path, text, errors_only=False, limit=5000):
+    """逐行读取日志文件（包括轮转的压缩文件），返回 (匹配的行, 匹配总数)，不区分大小写"""
+    text = text.lower()
+    matches = []
+    total = 0
+    for file_path in log_files(path):
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if errors_only and '|| WARNING ||' not in line and '|| ERROR ||' not in line:
+                    continue
+                if text and text not in line.lower():
+                    continue
+                total += 1
+                if len(matches) < limit:
+                    matches.append(line)
+    return matches, total
@@ -3,29 +3,37 @@ import logging
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from utils import (
-    read_categories_from_excel, 
-    read_sheet_names_from_excel, 
-    open_browser,
-    process_link
-)
+from job_planner import plan_import_jobs
+from keyword_sources import KEYWORD_FILE_FILTER
+from product_index import ProductIndex
+from run_control import SHUTDOWN_DEADLINE
+from run_journal import load_resume_state, resumable_workbook
+from log_pipeline import setup_logging, search_log_file
 import os
 import ctypes
-import time
+import threading
+from collections import OrderedDict, deque
+
+# 运行日志窗口最多保留的行数，更早的日志只在日志文件中
+LOG_VIEW_MAX_LINES = 5000
+
+# 日志文件搜索最多显示的匹配行数
+LOG_SEARCH_LIMIT = 5000
 
 class ImportifyApp(QMainWindow):
-    def __init__(self):
+    log_search_done = pyqtSignal(str)
+
+    def __init__(self, log_path=None):
         super().__init__()
+        self.log_path = log_path
         self.logger = None
         self.worker = None
         self.thread = None
         self.is_closing = False
+        self.close_finished = False
         self.init_ui()
-        self.load_last_excel_path()
+        # 窗口显示后再读取上次的工作簿
+        QTimer.singleShot(0, self.load_last_excel_path)
 
     def init_ui(self):
         self.setWindowTitle("阿里巴巴产品导入工具")
@@ -52,7 +60,7 @@ class ImportifyApp(QMainWindow):
         self.statusBar().showMessage('就绪')
 
         # 初始化日志处理器
-        self.logger = QTextEditLogger(self.log_text)
+        self.logger = LogViewHandler(self.log_text)
         logging.getLogger().addHandler(self.logger)
         logging.getLogger().setLevel(logging.INFO)
 
@@ -95,8 +103,24 @@ class ImportifyApp(QMainWindow):
         # 日志标签页
         self.log_tab = QWidget()
         log_layout = QVBoxLayout()
-        self.log_text = QTextEdit()
+        # 日志搜索：在日志文件中查找，不受窗口保留行数的限制
+        search_layout = QHBoxLayout()
+        self.log_search = QLineEdit()
+        self.log_search.setPlaceholderText("在本次运行的日志文件中搜索...")
+        self.log_search.returnPressed.connect(self.search_log)
+        self.log_errors_only = QCheckBox("只看警告和错误")
+        self.log_search_button = QPushButton("搜索")
+        self.log_search_button.clicked.connect(self.search_log)
+        search_layout.addWidget(self.log_search)
+        search_layout.addWidget(self.log_errors_only)
+        search_layout.addWidget(self.log_search_button)
+        log_layout.addLayout(search_layout)
+        self.log_search_done.connect(self.show_log_search)
+        
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        # 只保留最近的日志行，长时间运行时内存和刷新开销保持不变
+        self.log_text.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
         # 设置最小高度，允许调节大小
         self.log_text.setMinimumHeight(200)
         log_layout.addWidget(self.log_text)
@@ -105,10 +129,15 @@ class ImportifyApp(QMainWindow):
         # 数据预览标签页
         self.preview_tab = QWidget()
         preview_layout = QVBoxLayout()
-        self.preview_table = QTableWidget()
-        # 设置表格自适应大小
+        # 表格只在显示时读取数据，十万行的关键词列表也可以立即滚动
+        self.preview_model = PreviewModel()
+        self.preview_table = QTableView()
+        self.preview_table.setModel(self.preview_model)
         self.preview_table.horizontalHeader().setStretchLastSection(True)
-        self.preview_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.preview_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        # 固定行高，避免按内容计算每一行的高度
+        self.preview_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.preview_table.verticalHeader().setDefaultSectionSize(24)
         preview_layout.addWidget(self.preview_table)
         self.preview_tab.setLayout(preview_layout)
         
@@ -135,11 +164,18 @@ class ImportifyApp(QMainWindow):
         self.pause_button = QPushButton("暂停")
         self.pause_button.setEnabled(False)
         
+        self.resume_button = QPushButton("继续上次导入")
+        
         self.start_button.clicked.connect(self.start_import)
         self.pause_button.clicked.connect(self.toggle_pause)
+        self.resume_button.clicked.connect(self.resume_import)
         
         button_layout.addWidget(self.start_button)
         button_layout.addWidget(self.pause_button)
+        button_layout.addWidget(self.resume_button)
+        # 窗口显示后再检查任务日志
+        self.resume_button.setEnabled(False)
+        QTimer.singleShot(0, self.update_resume_button)
         control_layout.addLayout(button_layout)
         
         control_group.setLayout(control_layout)
@@ -164,7 +200,7 @@ class ImportifyApp(QMainWindow):
             self,
             "选择Excel文件",
             last_directory,  # 从上次的目录开始
-            "Excel Files (*.xlsx *.xls)"
+            KEYWORD_FILE_FILTER
         )
         if file_path:
             self.file_path.setText(file_path)
@@ -173,20 +209,18 @@ class ImportifyApp(QMainWindow):
 
     def load_preview_data(self, file_path):
         try:
-            categories = read_categories_from_excel(file_path)
-            sheet_names = read_sheet_names_from_excel(file_path)
+            plan = plan_import_jobs(file_path)
             
             # 更新预览表格
-            self.preview_table.setRowCount(len(categories))
-            self.preview_table.setColumnCount(2)
-            self.preview_table.setHorizontalHeaderLabels(["产品类别", "目标分类"])
-            
-            for i, category in enumerate(categories):
-                self.preview_table.setItem(i, 0, QTableWidgetItem(category))
-                if i < len(sheet_names):
-                    self.preview_table.setItem(i, 1, QTableWidgetItem(sheet_names[i]))
-            
-            self.preview_table.resizeColumnsToContents()
+            if not self.preview_model.product_index:
+                self.preview_model.product_index = ProductIndex()
+            self.preview_model.set_jobs(plan.jobs)
+            self.preview_table.setColumnWidth(0, 300)
+            self.preview_table.setColumnWidth(1, 200)
+            settings = QSettings('ImportifyApp', 'Settings')
+            logging.info(plan.summary(
+                int(settings.value('target_products', 0)), int(settings.value('worker_count', 1))
+            ))
             
         except Exception as e:
             logging.error(f"加载预览数据时出错: {str(e)}")
@@ -195,14 +229,33 @@ class ImportifyApp(QMainWindow):
         if not self.file_path.text():
             QMessageBox.warning(self, "警告", "请先选择Excel文件")
             return
-            
+        self.launch_worker()
+
+    def resume_import(self):
+        """从任务日志中恢复上次中断的导入任务"""
+        if self.thread and self.thread.isRunning():
+            return
+        resume_state = load_resume_state()
+        if not resume_state:
+            QMessageBox.information(self, "提示", "没有可以继续的导入任务")
+            self.update_resume_button()
+            return
+        self.file_path.setText(resume_state.workbook)
+        self.load_preview_data(resume_state.workbook)
+        self.launch_worker(resume_state)
+
+    def update_resume_button(self):
+        self.resume_button.setEnabled(resumable_workbook() is not None)
+
+    def launch_worker(self, resume_state=None):
         self.start_button.setEnabled(False)
+        self.resume_button.setEnabled(False)
         self.pause_button.setEnabled(True)
         self.pause_button.setText("暂停")
         
         # 创建工作线程
         self.thread = QThread()
-        self.worker = ImportWorker(self.file_path.text())
+        self.worker = ImportWorker(self.file_path.text(), resume_state)
         self.worker.moveToThread(self.thread)
         
         # 连接信号
@@ -215,7 +268,6 @@ class ImportifyApp(QMainWindow):
         self.worker.progress.connect(self.update_progress)
         self.worker.total_updated.connect(self.update_total)
         self.worker.status_changed.connect(self.update_pause_button)
-        self.worker.log_message.connect(self.log_message)
         
         # 启动线程
         self.thread.start()
@@ -247,10 +299,15 @@ class ImportifyApp(QMainWindow):
         self.pause_button.setText("暂停")
         self.progress.setValue(0)
         self.progress_label.setText("0/0")
+        # 线程和工作者在结束后会被删除，不再保留引用
+        self.thread = None
+        self.worker = None
+        self.update_resume_button()
+        self.preview_model.refresh_status()
         logging.info("导入任务完成")
 
     def closeEvent(self, event):
-        """处理窗口关闭事件"""
+        """处理窗口关闭事件：导入任务运行中时先停止任务，导入线程结束后再关闭窗口"""
         if self.is_closing:
             event.accept()
             return
@@ -262,41 +319,37 @@ class ImportifyApp(QMainWindow):
         self.setEnabled(False)
         self.statusBar().showMessage("正在关闭程序...")
         
-        def cleanup():
-            try:
-                # 停止日志处理器
-                if self.logger:
-                    self.logger.stop()
-                    logging.getLogger().removeHandler(self.logger)
-                
-                # 停止工作线程
-                if self.worker:
-                    self.worker.stop()
-                
-                # 等待线程结束
-                if self.thread and self.thread.isRunning():
-                    self.thread.quit()
-                    self.thread.wait(100)
-                    
-                # 确保浏览器关闭
-                if self.worker and self.worker.driver:
-                    try:
-                        self.worker.driver.quit()
-                    except:
-                        pass
-                    
-            except Exception as e:
-                logging.error(f"清理资源时出错: {str(e)}")
-            finally:
-                # 确保程序退出
-                QTimer.singleShot(0, self.force_quit)
-        
-        # 在新线程中执行清理
-        cleanup_thread = QThread()
-        cleanup_worker = QObject()
-        cleanup_worker.moveToThread(cleanup_thread)
-        cleanup_thread.started.connect(cleanup)
-        cleanup_thread.start()
+        if self.thread and self.thread.isRunning():
+            # 工作者在下一个检查点退出并保存进度，导入线程结束后关闭窗口
+            self.thread.finished.connect(self.finish_close)
+            self.worker.stop()
+            # run() 在 SHUTDOWN_DEADLINE 秒后会强制结束浏览器，超过这个时间仍未结束时不再等待
+            QTimer.singleShot((SHUTDOWN_DEADLINE + 10) * 1000, self.finish_close)
+        else:
+            QTimer.singleShot(0, self.finish_close)
+
+    def finish_close(self):
+        """导入线程结束（或等待超时）后清理资源并退出程序"""
+        if self.close_finished:
+            return
+        self.close_finished = True
+        try:
+            # 停止日志处理器
+            if self.logger:
+                self.logger.stop()
+                logging.getLogger().removeHandler(self.logger)
+
+            # 等待超时时导入线程仍在运行，强制结束浏览器后再等一会儿
+            if self.thread and self.thread.isRunning():
+                self.worker.kill_browsers()
+                self.thread.quit()
+                self.thread.wait(5000)
+        except Exception as e:
+            logging.error(f"清理资源时出错: {str(e)}")
+        finally:
+            self.close()
+            # 确保程序退出
+            QTimer.singleShot(0, self.force_quit)
 
     def force_quit(self):
         """强制退出程序"""
@@ -318,136 +371,120 @@ class ImportifyApp(QMainWindow):
         settings = QSettings('ImportifyApp', 'Settings')
         settings.setValue('last_excel_path', file_path)
 
-    def log_message(self, message):
-        logging.info(message)
+    def search_log(self):
+        """在后台线程中搜索日志文件，结果通过信号交给界面显示"""
+        if not self.log_path or not os.path.exists(self.log_path):
+            QMessageBox.information(self, "提示", "没有日志文件")
+            return
+        text = self.log_search.text()
+        errors_only = self.log_errors_only.isChecked()
+        self.log_search_button.setEnabled(False)
+
+        def run():
+            try:
+                matches, total = search_log_file(self.log_path, text, errors_only, LOG_SEARCH_LIMIT)
+                header = f"共 {total} 行匹配" + (f"，只显示前 {len(matches)} 行" if total > len(matches) else "")
+                self.log_search_done.emit(header + "\n" + "".join(matches))
+            except Exception as e:
+                self.log_search_done.emit(f"搜索日志文件失败: {str(e)}")
+
+        threading.Thread(target=run, name="LogSearch", daemon=True).start()
+
+    def show_log_search(self, result):
+        self.log_search_button.setEnabled(True)
+        dialog = QDialog(self)
+        dialog.setWindowTitle("日志搜索结果")
+        dialog.resize(900, 500)
+        layout = QVBoxLayout(dialog)
+        view = QPlainTextEdit()
+        view.setReadOnly(True)
+        view.setPlainText(result)
+        layout.addWidget(view)
+        dialog.show()
 
 class ImportWorker(QObject):
+    """ImportEngine 的Qt适配器：从QSettings读取设置，把引擎事件转换成信号"""
+
     progress = pyqtSignal(int)
     total_updated = pyqtSignal(int)
     finished = pyqtSignal()
     status_changed = pyqtSignal(bool)
-    log_message = pyqtSignal(str)
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, resume_state=None):
         super().__init__()
-        self.file_path = file_path
-        self.is_running = True
-        self.is_paused = False
-        self.driver = None
-        
+        # 导入引擎依赖selenium，第一次开始导入时才加载，避免拖慢程序启动
+        from import_engine import ImportEngine
+        self.engine = ImportEngine(file_path, resume_state=resume_state, listener=self.on_engine_event)
+
+    @property
+    def drivers(self):
+        return self.engine.drivers
+
+    @property
+    def is_running(self):
+        return self.engine.is_running
+
+    @property
+    def is_paused(self):
+        return self.engine.is_paused
+
+    def on_engine_event(self, event, **fields):
+        if event == 'total':
+            self.total_updated.emit(fields['total'])
+        elif event == 'progress':
+            self.progress.emit(fields['completed'])
+
     def stop(self):
-        """停止工作线程"""
-        self.is_running = False
-        self.is_paused = False
-        
-        # 确保浏览器被关闭
-        if self.driver:
-            try:
-                self.driver.close()
-                self.driver.quit()
-            except:
-                pass
-            finally:
-                self.driver = None
-                
-        # 发送完成信号
-        self.finished.emit()
-
-    def emit_log(self, message):
-        self.log_message.emit(message)
+        """请求停止：各工作者在下一个检查点退出，run() 负责等待和清理"""
+        self.engine.stop()
 
     def pause(self):
-        self.is_paused = True
-        from utils import process_link
-        process_link.is_paused = True
+        self.engine.pause()
         self.status_changed.emit(True)
-        self.emit_log("导入任务已暂停")
 
     def resume(self):
-        self.is_paused = False
-        from utils import process_link
-        process_link.is_paused = False
+        self.engine.resume()
         self.status_changed.emit(False)
-        self.emit_log("导入任务继续进行")
+
+    def kill_browsers(self):
+        self.engine.kill_browsers()
 
     def run(self):
+        # 异常不能离开Qt槽函数，否则PyQt6会直接结束进程
         try:
-            if not self.is_running:
-                return
-
+            from import_engine import DEFAULT_SETTINGS, normalize_settings
             settings = QSettings('ImportifyApp', 'Settings')
-            driver_path = settings.value('driver_path', '')
-            user_data_dir = settings.value('user_data_dir', '')
-            wait_time = int(settings.value('wait_time', 10))
-
-            categories = read_categories_from_excel(self.file_path)
-            sheet_names = read_sheet_names_from_excel(self.file_path)
-            
-            if not self.is_running:
-                return
-                
-            if not categories or not sheet_names:
-                logging.error("没有找到有效的数据")
-                return
-                
-            target_sheet_name = sheet_names[0]
-            total = len(categories)
-            self.total_updated.emit(total)
-            
-            max_browser_retries = 3
-            for retry in range(max_browser_retries):
-                if not self.is_running:
-                    return
-                try:
-                    self.driver = open_browser(driver_path, user_data_dir)
-                    if self.driver:
-                        break
-                except Exception as e:
-                    logging.error(f"创建浏览器实例失败 (尝试 {retry + 1}/{max_browser_retries}): {str(e)}")
-                    if retry == max_browser_retries - 1:
-                        raise
-                    time.sleep(2)
-            
-            if not self.driver or not self.is_running:
-                return
-
-            try:
-                url = "https://www.alibaba.com/"
-                self.driver.get(url)
-                
-                for index, category in enumerate(categories, 1):
-                    if not self.is_running:
-                        break
-
-                    while self.is_paused and self.is_running:
-                        time.sleep(0.5)
-                    
-                    if not self.is_running:
-                        break
-                    
-                    try:
-                        process_link(self.driver, category, target_sheet_name)
-                    except Exception as e:
-                        logging.error(f"处理类别出错: {str(e)}")
-                        if not self.is_running:
-                            break
-                        continue
-                        
-                    self.progress.emit(index)
-
-            finally:
-                if self.driver:
-                    try:
-                        self.driver.quit()
-                    except:
-                        pass
-                    self.driver = None
-
+            self.engine.settings = normalize_settings({key: settings.value(key) for key in DEFAULT_SETTINGS})
+            self.engine.run()
         except Exception as e:
-            logging.error(f"导入过程出错: {str(e)}")
+            logging.error(f"导入设置无效或导入任务出错: {str(e)}")
         finally:
             self.finished.emit()
 
+# 设置界面中的搜索排序方式
+SEARCH_SORTS = [
+    ("默认（最佳匹配）", ''),
+    ("订单量", 'orders'),
+    ("价格从低到高", 'price_asc'),
+    ("价格从高到低", 'price_desc'),
+]
+
+# 设置界面中的变体选择策略
+VARIANT_POLICIES = [
+    ("只导入第一个变体", 'first'),
+    ("价格最低的N个变体", 'cheapest'),
+    ("只导入有库存的变体", 'in_stock'),
+    ("价格区间内的变体", 'price_band'),
+]
+
+# 精简模式下可以屏蔽的资源类型
+BLOCKED_TYPES = [
+    ("图片", 'image'),
+    ("字体", 'font'),
+    ("视频/音频", 'media'),
+    ("统计和广告脚本", 'tracker'),
+]
+
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -511,11 +548,107 @@ class SettingsDialog(QDialog):
         user_data_group.setLayout(user_data_layout)
         layout.addRow(user_data_group)
         
-        # 等待时间
-        self.wait_time = QSpinBox()
-        self.wait_time.setRange(1, 60)
-        self.wait_time.setValue(10)  # 默认值
-        layout.addRow("等待时间(秒):", self.wait_time)
+        # 自适应超时：按各等待点的历史耗时缩短超时，失败时更快放弃
+        self.adaptive_timeouts = QCheckBox("按实际耗时自动调整超时")
+        self.adaptive_timeouts.setChecked(True)
+        self.adaptive_timeouts.setToolTip("每个等待点的超时 = 最近耗时的95%分位数 × 安全系数，不超过原来的固定超时")
+        layout.addRow("自适应超时:", self.adaptive_timeouts)
+
+        self.timeout_safety = QDoubleSpinBox()
+        self.timeout_safety.setRange(1.5, 10.0)
+        self.timeout_safety.setSingleStep(0.5)
+        self.timeout_safety.setValue(3.0)
+        layout.addRow("超时安全系数:", self.timeout_safety)
+        
+        # 并行浏览器数量
+        self.worker_count = QSpinBox()
+        self.worker_count.setRange(1, 8)
+        self.worker_count.setValue(1)  # 默认值
+        layout.addRow("并行浏览器数量:", self.worker_count)
+        
+        # 浏览器命令期限，超过后强制结束并重启浏览器
+        self.command_deadline = QSpinBox()
+        self.command_deadline.setRange(30, 600)
+        self.command_deadline.setValue(90)  # 默认值
+        layout.addRow("浏览器无响应重启(秒):", self.command_deadline)
+        
+        self.keep_spare_browser = QCheckBox("为每个浏览器预先启动一个备用浏览器（重启更快，占用更多内存）")
+        layout.addRow(self.keep_spare_browser)
+        
+        # 页面条件满足后的最短等待时间
+        self.wait_floor = QDoubleSpinBox()
+        self.wait_floor.setRange(0, 5)
+        self.wait_floor.setSingleStep(0.1)
+        self.wait_floor.setValue(0.2)  # 默认值
+        layout.addRow("最短等待时间(秒):", self.wait_floor)
+        
+        # 搜索方式
+        search_group = QGroupBox("搜索")
+        search_layout = QFormLayout()
+        self.search_mode = QComboBox()
+        self.search_mode.addItem("直接打开搜索链接（推荐）", 'url')
+        self.search_mode.addItem("使用首页搜索框", 'search_box')
+        search_layout.addRow("搜索方式:", self.search_mode)
+        self.search_sort = QComboBox()
+        for label, sort in SEARCH_SORTS:
+            self.search_sort.addItem(label, sort)
+        search_layout.addRow("排序:", self.search_sort)
+        self.verified_supplier = QCheckBox("只搜索认证供应商")
+        search_layout.addRow(self.verified_supplier)
+        self.search_extra_params = QLineEdit()
+        self.search_extra_params.setPlaceholderText("其他搜索参数，例如 key=value&key2=value2")
+        search_layout.addRow("其他参数:", self.search_extra_params)
+        self.target_products = QSpinBox()
+        self.target_products.setRange(0, 5000)
+        self.target_products.setSpecialValueText("只取第一页")
+        search_layout.addRow("每个关键词的产品数:", self.target_products)
+        search_group.setLayout(search_layout)
+        layout.addRow(search_group)
+        
+        # 变体选择策略
+        variant_group = QGroupBox("变体选择")
+        variant_layout = QFormLayout()
+        self.variant_policy = QComboBox()
+        for label, policy in VARIANT_POLICIES:
+            self.variant_policy.addItem(label, policy)
+        variant_layout.addRow("策略:", self.variant_policy)
+        self.variant_count = QSpinBox()
+        self.variant_count.setRange(1, 100)
+        variant_layout.addRow("最便宜的数量:", self.variant_count)
+        self.variant_price_min = QDoubleSpinBox()
+        self.variant_price_min.setRange(0, 100000)
+        self.variant_price_min.setSpecialValueText("不限")
+        variant_layout.addRow("最低价格:", self.variant_price_min)
+        self.variant_price_max = QDoubleSpinBox()
+        self.variant_price_max.setRange(0, 100000)
+        self.variant_price_max.setSpecialValueText("不限")
+        variant_layout.addRow("最高价格:", self.variant_price_max)
+        variant_group.setLayout(variant_layout)
+        layout.addRow(variant_group)
+        
+        # 精简浏览器模式
+        lean_group = QGroupBox("精简浏览器模式")
+        lean_layout = QFormLayout()
+        self.lean_mode = QCheckBox("启用（页面DOM就绪即继续，并屏蔽下列资源）")
+        lean_layout.addRow(self.lean_mode)
+        self.headless = QCheckBox("无头模式（不显示浏览器窗口）")
+        lean_layout.addRow(self.headless)
+        blocked_layout = QHBoxLayout()
+        self.blocked_types = {}
+        for label, value in BLOCKED_TYPES:
+            checkbox = QCheckBox(label)
+            self.blocked_types[value] = checkbox
+            blocked_layout.addWidget(checkbox)
+        lean_layout.addRow("屏蔽:", blocked_layout)
+        self.blocked_patterns = QLineEdit()
+        self.blocked_patterns.setPlaceholderText("其他要屏蔽的链接，逗号分隔，例如 *://*.example.com/*")
+        lean_layout.addRow("其他屏蔽:", self.blocked_patterns)
+        lean_group.setLayout(lean_layout)
+        layout.addRow(lean_group)
+        
+        # 阶段耗时追踪
+        self.trace_enabled = QCheckBox("记录每个产品各阶段的耗时（logs/trace_*.jsonl）")
+        layout.addRow(self.trace_enabled)
         
         # 下载提示
         tip_label = QLabel("提示：如果自动下载失败，请手动下载ChromeDriver并指定路径")
@@ -580,7 +713,29 @@ class SettingsDialog(QDialog):
         else:
             self.user_data_dir.setText(settings.value('user_data_dir', ''))
         
-        self.wait_time.setValue(int(settings.value('wait_time', 10)))
+        self.adaptive_timeouts.setChecked(settings.value('adaptive_timeouts', True, type=bool))
+        self.timeout_safety.setValue(float(settings.value('timeout_safety', 3.0)))
+        self.worker_count.setValue(int(settings.value('worker_count', 1)))
+        self.command_deadline.setValue(int(settings.value('command_deadline', 90)))
+        self.keep_spare_browser.setChecked(settings.value('keep_spare_browser', False, type=bool))
+        self.wait_floor.setValue(float(settings.value('wait_floor', 0.2)))
+        self.trace_enabled.setChecked(settings.value('trace_enabled', False, type=bool))
+        self.search_mode.setCurrentIndex(max(0, self.search_mode.findData(settings.value('search_mode', 'url'))))
+        self.search_sort.setCurrentIndex(max(0, self.search_sort.findData(settings.value('search_sort', ''))))
+        self.verified_supplier.setChecked(settings.value('verified_supplier', False, type=bool))
+        self.search_extra_params.setText(settings.value('search_extra_params', ''))
+        self.target_products.setValue(int(settings.value('target_products', 0)))
+        policy_index = self.variant_policy.findData(settings.value('variant_policy', 'first'))
+        self.variant_policy.setCurrentIndex(max(0, policy_index))
+        self.variant_count.setValue(int(settings.value('variant_count', 1)))
+        self.variant_price_min.setValue(float(settings.value('variant_price_min', 0)))
+        self.variant_price_max.setValue(float(settings.value('variant_price_max', 0)))
+        self.lean_mode.setChecked(settings.value('lean_mode', False, type=bool))
+        self.headless.setChecked(settings.value('headless', True, type=bool))
+        blocked = settings.value('blocked_types', 'image,font,media,tracker').split(',')
+        for value, checkbox in self.blocked_types.items():
+            checkbox.setChecked(value in blocked)
+        self.blocked_patterns.setText(settings.value('blocked_patterns', ''))
         self.toggle_driver_path(self.auto_download.isChecked())
         self.toggle_user_data_dir(self.use_default_dir.isChecked())
 
@@ -590,10 +745,107 @@ class SettingsDialog(QDialog):
         settings.setValue('driver_path', self.driver_path.text())
         settings.setValue('use_default_dir', self.use_default_dir.isChecked())
         settings.setValue('user_data_dir', self.user_data_dir.text())
-        settings.setValue('wait_time', self.wait_time.value())
+        settings.setValue('adaptive_timeouts', self.adaptive_timeouts.isChecked())
+        settings.setValue('timeout_safety', self.timeout_safety.value())
+        settings.setValue('worker_count', self.worker_count.value())
+        settings.setValue('command_deadline', self.command_deadline.value())
+        settings.setValue('keep_spare_browser', self.keep_spare_browser.isChecked())
+        settings.setValue('wait_floor', self.wait_floor.value())
+        settings.setValue('trace_enabled', self.trace_enabled.isChecked())
+        settings.setValue('search_mode', self.search_mode.currentData())
+        settings.setValue('search_sort', self.search_sort.currentData())
+        settings.setValue('verified_supplier', self.verified_supplier.isChecked())
+        settings.setValue('search_extra_params', self.search_extra_params.text())
+        settings.setValue('target_products', self.target_products.value())
+        settings.setValue('variant_policy', self.variant_policy.currentData())
+        settings.setValue('variant_count', self.variant_count.value())
+        settings.setValue('variant_price_min', self.variant_price_min.value())
+        settings.setValue('variant_price_max', self.variant_price_max.value())
+        settings.setValue('lean_mode', self.lean_mode.isChecked())
+        settings.setValue('headless', self.headless.isChecked())
+        settings.setValue('blocked_types', ','.join(
+            value for value, checkbox in self.blocked_types.items() if checkbox.isChecked()))
+        settings.setValue('blocked_patterns', self.blocked_patterns.text())
         self.accept()
 
-class QTextEditLogger(logging.Handler, QObject):
+class PreviewModel(QAbstractTableModel):
+    """数据预览的表格模型，只保存任务列表，单元格内容在显示时才生成
+
+    历史导入状态按关键词从产品索引中查询，只缓存最近显示过的关键词。
+    """
+
+    HEADERS = ["产品类别", "目标分类", "历史导入"]
+    STATUS_CACHE_SIZE = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = []
+        self.product_index = None
+        self.status_cache = OrderedDict()
+
+    def set_jobs(self, jobs):
+        self.beginResetModel()
+        self.jobs = jobs
+        self.status_cache.clear()
+        self.endResetModel()
+
+    def refresh_status(self):
+        """导入结束后重新查询历史导入状态"""
+        self.status_cache.clear()
+        if self.jobs:
+            self.dataChanged.emit(self.index(0, 2), self.index(len(self.jobs) - 1, 2))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        job = self.jobs[index.row()]
+        if index.column() == 0:
+            return job.keyword
+        if index.column() == 1:
+            return job.collection
+        return self.import_status(job.keyword)
+
+    def import_status(self, keyword):
+        if keyword in self.status_cache:
+            self.status_cache.move_to_end(keyword)
+            return self.status_cache[keyword]
+        if not self.product_index:
+            return ""
+        try:
+            counts = self.product_index.category_counts(keyword)
+        except Exception as e:
+            logging.error(f"查询历史导入状态失败: {str(e)}")
+            return ""
+        if counts:
+            text = f"已导入 {counts.get('imported', 0)}，已存在 {counts.get('exists', 0)}"
+        else:
+            text = "未导入"
+        self.status_cache[keyword] = text
+        if len(self.status_cache) > self.STATUS_CACHE_SIZE:
+            self.status_cache.popitem(last=False)
+        return text
+
+class LogViewHandler(logging.Handler, QObject):
+    """把日志显示到运行日志窗口
+
+    任意线程中的日志先放入deque（append/popleft是原子操作，不需要加锁），
+    界面线程每100ms取出全部日志，用一次插入操作写入窗口。
+    deque和窗口都有长度上限，长时间运行也不会占用越来越多的内存。
+    """
+
     def __init__(self, widget):
         super().__init__()
         QObject.__init__(self)
@@ -601,11 +853,11 @@ class QTextEditLogger(logging.Handler, QObject):
         self.widget.setReadOnly(True)
         self.setFormatter(logging.Formatter('%(asctime)s || %(message)s'))
         
+        self.pending_records = deque(maxlen=LOG_VIEW_MAX_LINES)
+        self.is_closing = False
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_log)
         self.update_timer.start(100)
-        self.pending_records = []
-        self.is_closing = False
 
     def stop(self):
         self.is_closing = True
@@ -614,17 +866,23 @@ class QTextEditLogger(logging.Handler, QObject):
 
     def emit(self, record):
         if not self.is_closing:
-            msg = self.format(record)
-            self.pending_records.append(msg)
+            self.pending_records.append(self.format(record))
 
     def update_log(self):
-        if self.pending_records and not self.is_closing:
-            for msg in self.pending_records:
-                self.widget.append(msg)
-            self.widget.verticalScrollBar().setValue(
-                self.widget.verticalScrollBar().maximum()
-            )
-            self.pending_records.clear()
+        if self.is_closing or not self.pending_records:
+            return
+        lines = []
+        while True:
+            try:
+                lines.append(self.pending_records.popleft())
+            except IndexError:
+                break
+        scrollbar = self.widget.verticalScrollBar()
+        # 用户向上翻看日志时不自动滚动到底部
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.widget.appendPlainText("\n".join(lines))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
 
 def main():
     app = QApplication(sys.argv)
@@ -641,8 +899,13 @@ def main():
     # 设置应用样式
     app.setStyle("Fusion")
     
-    window = ImportifyApp()
+    log_path = setup_logging()
+    window = ImportifyApp(log_path)
     window.show()
+    
+    # 命令行参数 --resume：启动后直接继续上次中断的任务
+    if '--resume' in sys.argv[1:]:
+        QTimer.singleShot(0, window.resume_import)
     sys.exit(app.exec())
 
 if __name__ == '__main__':
@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+# 已经在商店中的产品状态，这些产品不需要再打开
+DONE_STATUSES = ('imported', 'exists')
+
+def canonical_product_url(url):
+    """去掉链接中的查询参数和锚点，得到产品的规范链接"""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return None
+    return urlunsplit((parts.scheme.lower() or 'https', parts.netloc.lower(), parts.path, '', ''))
+
+def product_id_from_url(url):
+    """从产品链接中提取产品ID，无法识别时使用规范链接作为ID"""
+    canonical_url = canonical_product_url(url)
+    if not canonical_url:
+        return None
+    match = re.search(r'_(\d+)\.html$', canonical_url) or re.search(r'/(\d{6,})\.html$', canonical_url)
+    return match.group(1) if match else canonical_url
+
+class ProductIndex:
+    """持久化的已导入产品索引（SQLite），以产品ID为键
+
+    查询走主键索引，历史记录达到百万级也只需一次磁盘查找；
+    同时记录本次运行中已领取的产品，避免不同关键词搜到同一产品时重复导入。
+    """
+
+    def __init__(self, db_path='imported_products.db', progress_path='progress.json'):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.seen = set()
+        is_new = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS products ('
+            'product_id TEXT PRIMARY KEY, url TEXT, status TEXT, category TEXT, updated_at REAL)'
+        )
+        # 数据预览按关键词查询历史导入状态
+        self.conn.execute('CREATE INDEX IF NOT EXISTS products_category ON products (category)')
+        self.conn.commit()
+        if is_new:
+            self.import_progress_file(progress_path)
+
+    def import_progress_file(self, progress_path):
+        """把 progress.json 中旧的 processed_product_urls 迁移到索引中"""
+        if not progress_path or not os.path.exists(progress_path):
+            return
+        try:
+            with open(progress_path, 'r', encoding='utf-8') as f:
+                urls = json.load(f).get('processed_product_urls') or {}
+        except Exception as e:
+            logging.warning(f"读取进度文件失败: {str(e)}")
+            return
+        for url in urls:
+            product_id = product_id_from_url(url)
+            if product_id:
+                self.mark(product_id, 'imported', url)
+        if urls:
+            logging.info(f"从进度文件迁移了 {len(urls)} 个已处理产品")
+
+    def is_known(self, product_id):
+        """产品是否已经在商店中"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT status FROM products WHERE product_id = ?', (product_id,)
+            ).fetchone()
+        return bool(row) and row[0] in DONE_STATUSES
+
+    def claim(self, product_id):
+        """领取产品：已在商店中或本次运行已领取过时返回False"""
+        if not product_id:
+            return False
+        with self.lock:
+            if product_id in self.seen:
+                return False
+            self.seen.add(product_id)
+        return not self.is_known(product_id)
+
+    def mark(self, product_id, status, url=None, category=None):
+        """记录产品的处理结果"""
+        if not product_id:
+            return
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO products (product_id, url, status, category, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(product_id) DO UPDATE SET '
+                'url = COALESCE(excluded.url, url), status = excluded.status, '
+                'category = COALESCE(excluded.category, category), updated_at = excluded.updated_at',
+                (product_id, url, status, category, time.time())
+            )
+            self.conn.commit()
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute(
+                'SELECT COUNT(*) FROM products WHERE status IN (?, ?)', DONE_STATUSES
+            ).fetchone()[0]
+
+    def category_counts(self, category):
+        """某个关键词（类别）下各状态的产品数量"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT status, COUNT(*) FROM products WHERE category = ? GROUP BY status', (category,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
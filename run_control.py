@@ -0,0 +1,68 @@
+import threading
+
+# 停止时等待工作者完成当前阶段的最长时间（秒），超时后强制结束浏览器
+SHUTDOWN_DEADLINE = 15
+
+class StopRequested(BaseException):
+    """导入任务已停止，在检查点抛出
+
+    继承BaseException而不是Exception：导入流程中有很多 except Exception 的容错处理，
+    停止信号需要穿过它们直接回到工作者。
+    """
+
+class RunControl:
+    """导入任务的暂停、继续和停止（线程安全，所有工作者共用）
+
+    暂停和停止通过Condition通知，等待中的线程立即被唤醒，不需要轮询。
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.paused = False
+        self.stopped = False
+
+    def pause(self):
+        with self.condition:
+            self.paused = True
+            self.condition.notify_all()
+
+    def resume(self):
+        with self.condition:
+            self.paused = False
+            self.condition.notify_all()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.paused = False
+            self.condition.notify_all()
+
+    @property
+    def is_paused(self):
+        return self.paused
+
+    @property
+    def is_stopped(self):
+        return self.stopped
+
+    def wait_if_paused(self):
+        """暂停时阻塞到继续或停止，返回任务是否仍在运行"""
+        with self.condition:
+            while self.paused and not self.stopped:
+                self.condition.wait()
+            return not self.stopped
+
+    def checkpoint(self):
+        """阶段之间的检查点：暂停时在这里等待，停止时抛出 StopRequested"""
+        if not self.wait_if_paused():
+            raise StopRequested()
+
+# 当前导入任务的控制器，导入流程中的检查点通过它响应暂停和停止
+active_control = RunControl()
+
+def activate_control(control):
+    global active_control
+    active_control = control
+
+def checkpoint():
+    active_control.checkpoint()
@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+import time
+
+class RunJournal:
+    """导入任务的预写日志（JSONL），用于程序崩溃或关闭后从中断位置继续
+
+    每行一条记录：
+      run             开始一次新任务（工作簿路径、类别数量）
+      harvested       某个类别搜索结果中一页的产品链接
+      harvest_done    某个类别搜索完成
+      product         单个产品的处理结果
+      category_done   某个类别全部处理完成
+      run_done        任务正常结束
+    harvested、harvest_done 和 category_done 同时记录关键词和目标分类，
+    继续任务时只有与重新读取的任务列表一致才会使用。
+    记录先写入内存缓冲区，攒够一批或超过间隔时间后统一写盘并fsync，不拖慢导入循环；
+    后台线程按同样的间隔写盘，导入长时间停顿时缓冲区中的记录也不会丢失。
+    """
+
+    def __init__(self, path='run_journal.jsonl', batch_size=50, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.file = None
+        self.closed = threading.Event()
+        self.flusher = None
+
+    def start(self, workbook, total, resume=False):
+        """开始记录；resume为False时清空旧日志开始新任务"""
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume:
+            # 上次崩溃时最后一行可能没有写完，另起一行避免和新记录粘在一起
+            self.file.write('\n')
+        else:
+            self.record('run', workbook=os.path.abspath(workbook) if workbook else '', total=total)
+            self.flush()
+        self.closed.clear()
+        self.flusher = threading.Thread(target=self.flush_periodically, name="RunJournalFlush", daemon=True)
+        self.flusher.start()
+
+    def flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def record(self, event, **fields):
+        fields['event'] = event
+        fields['time'] = time.time()
+        with self.lock:
+            self.buffer.append(json.dumps(fields, ensure_ascii=False))
+            due = (len(self.buffer) >= self.batch_size
+                   or time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.file or not self.buffer:
+                self.last_flush = time.monotonic()
+                return
+            try:
+                self.file.write('\n'.join(self.buffer) + '\n')
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except Exception as e:
+                logging.error(f"写入任务日志失败: {str(e)}")
+            self.buffer.clear()
+            self.last_flush = time.monotonic()
+
+    def close(self, finished=False):
+        self.closed.set()
+        if self.flusher:
+            self.flusher.join()
+            self.flusher = None
+        if finished:
+            self.record('run_done')
+        self.flush()
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+class ResumeState:
+    """从任务日志中恢复出的中断位置"""
+
+    def __init__(self, workbook, total):
+        self.workbook = workbook
+        self.total = total
+        self.done_categories = {}
+        self.harvested = {}
+        self.harvest_done = {}
+        self.outcomes = {}
+
+    def add_harvested(self, index, job, products):
+        # 同一位置的关键词变了（日志中有多次运行的记录时），丢弃之前的产品
+        current = self.harvested.get(index)
+        if not current or current[0] != job:
+            self.harvested[index] = (job, [])
+        self.harvested[index][1].extend(tuple(p) for p in products)
+
+    def is_done(self, index, keyword, collection):
+        """类别是否已经全部处理完成；工作簿改动后关键词或目标分类不一致的记录不算"""
+        return self.done_categories.get(index) == (keyword, collection)
+
+    def pending_products(self, index, keyword, collection):
+        """某个已搜索完成的类别中尚未处理的产品
+
+        没有搜索过、搜索到一半中断，或记录的关键词、目标分类与当前任务不一致时返回None，需要重新搜索。
+        """
+        job = (keyword, collection)
+        harvested = self.harvested.get(index)
+        if not harvested or harvested[0] != job or self.harvest_done.get(index) != job:
+            return None
+        return [
+            (title, url) for title, url in harvested[1]
+            if url not in self.outcomes
+        ]
+
+def journal_job(entry):
+    """记录中的 (关键词, 目标分类)；旧版本的日志没有这两个字段，不会与任何任务匹配"""
+    return (entry.get('keyword'), entry.get('collection'))
+
+# 判断任务是否已结束时读取的日志末尾长度（字节）
+TAIL_BYTES = 4096
+
+def resumable_workbook(path='run_journal.jsonl'):
+    """只读取日志的第一行和末尾，返回中断任务的工作簿路径；没有可继续的任务时返回None
+
+    界面用它决定是否启用“继续上次导入”，不解析整个日志。
+    """
+    try:
+        with open(path, 'rb') as f:
+            first = json.loads(f.readline())
+            if first.get('event') != 'run':
+                return None
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - TAIL_BYTES))
+            tail = f.read().decode('utf-8', errors='ignore').splitlines()
+    except (OSError, ValueError, AttributeError):
+        return None
+    for line in reversed(tail):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # 空行、被截断的第一行或崩溃时只写了一半的最后一行
+            continue
+        if entry.get('event') == 'run_done':
+            return None
+        break
+    workbook = first.get('workbook')
+    return workbook if workbook and os.path.isfile(workbook) else None
+
+def load_resume_state(path='run_journal.jsonl'):
+    """读取任务日志，返回中断任务的状态；没有可继续的任务时返回None"""
+    if not os.path.exists(path):
+        return None
+
+    state = None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                event = entry.get('event')
+                if event == 'run':
+                    state = ResumeState(entry.get('workbook'), entry.get('total', 0))
+                elif state is None:
+                    continue
+                elif event == 'harvested':
+                    state.add_harvested(entry['index'], journal_job(entry), entry.get('products', []))
+                elif event == 'harvest_done':
+                    state.harvest_done[entry['index']] = journal_job(entry)
+                elif event == 'product':
+                    state.outcomes[entry['url']] = entry.get('outcome')
+                elif event == 'category_done':
+                    state.done_categories[entry['index']] = journal_job(entry)
+                elif event == 'run_done':
+                    state = None
+    except Exception as e:
+        logging.error(f"读取任务日志失败: {str(e)}")
+        return None
+
+    if state and state.workbook and os.path.isfile(state.workbook):
+        return state
+    return None
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+# 校验数据文件，每次运行结束时保存，下次运行继续使用
+CALIBRATION_PATH = 'timeout_calibration.json'
+
+# 每个等待点保留的最近耗时样本数量
+SAMPLE_WINDOW = 200
+
+# 样本达到这个数量后才使用自适应超时，之前使用代码中的默认超时
+MIN_SAMPLES = 10
+
+# 自适应超时的下限（秒）
+MIN_TIMEOUT = 1.0
+
+# 用于计算超时的分位数
+PERCENTILE = 0.95
+
+class TimeoutManager:
+    """按等待点记录实际耗时，用近期耗时的高分位数乘以安全系数作为超时
+
+    代码中写的超时（例如 WebDriverWait 的10秒）作为默认值和上限：样本不足时使用默认值，
+    样本足够后超时 = min(默认值, max(MIN_TIMEOUT, p95 * 安全系数 * 退避倍数))。
+    自适应超时过短导致超时后，该等待点的退避倍数翻倍，成功后逐步恢复，
+    避免网站整体变慢时连续误判失败。
+    """
+
+    def __init__(self, safety=3.0, enabled=True):
+        self.lock = threading.Lock()
+        self.safety = safety
+        self.enabled = enabled
+        self.samples = {}
+        self.backoff = {}
+        self.misses = {}
+
+    def configure(self, enabled=True, safety=3.0):
+        with self.lock:
+            self.enabled = bool(enabled)
+            self.safety = max(1.0, float(safety))
+
+    def timeout(self, name, default):
+        """返回等待点当前的超时（秒）"""
+        with self.lock:
+            samples = self.samples.get(name)
+            if not self.enabled or not samples or len(samples) < MIN_SAMPLES:
+                return default
+            ordered = sorted(samples)
+            high = ordered[min(len(ordered) - 1, int(len(ordered) * PERCENTILE))]
+            adaptive = high * self.safety * self.backoff.get(name, 1.0)
+        return min(default, max(MIN_TIMEOUT, adaptive))
+
+    def record(self, name, seconds):
+        """记录一次在超时前完成的等待"""
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=SAMPLE_WINDOW)).append(seconds)
+            backoff = self.backoff.get(name)
+            if backoff:
+                backoff /= 2
+                if backoff <= 1.0:
+                    del self.backoff[name]
+                else:
+                    self.backoff[name] = backoff
+
+    def miss(self, name, timeout, default):
+        """记录一次超时；用的是缩短后的超时时，下次放宽"""
+        with self.lock:
+            self.misses[name] = self.misses.get(name, 0) + 1
+            if timeout < default:
+                self.backoff[name] = self.backoff.get(name, 1.0) * 2
+
+    def load(self, path=CALIBRATION_PATH):
+        """读取上次运行保存的耗时样本，并清空本次运行的超时统计"""
+        with self.lock:
+            self.backoff.clear()
+            self.misses.clear()
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self.lock:
+                for name, samples in data.get('samples', {}).items():
+                    self.samples[name] = deque((float(s) for s in samples), maxlen=SAMPLE_WINDOW)
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            logging.warning(f"读取超时校验数据失败: {str(e)}")
+
+    def save(self, path=CALIBRATION_PATH):
+        with self.lock:
+            data = {'samples': {name: [round(s, 3) for s in samples] for name, samples in self.samples.items()}}
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logging.warning(f"保存超时校验数据失败: {str(e)}")
+
+    def report(self):
+        """返回报告文本：每个等待点的样本数、p95耗时和超时次数"""
+        with self.lock:
+            names = sorted(set(self.samples) | set(self.misses))
+            rows = []
+            for name in names:
+                ordered = sorted(self.samples.get(name, ()))
+                high = ordered[min(len(ordered) - 1, int(len(ordered) * PERCENTILE))] if ordered else None
+                rows.append((name, len(ordered), high, self.misses.get(name, 0)))
+        if not rows:
+            return "没有超时校验数据"
+        lines = ["超时校验:"]
+        for name, count, high, misses in rows:
+            p95 = f"{high:.1f}s" if high is not None else "-"
+            lines.append(f"  {name}: {count} 个样本, p95 {p95}, 超时 {misses} 次")
+        return "\n".join(lines)
+
+timeouts = TimeoutManager()
+
+def set_adaptive_timeouts(enabled=True, safety=3.0):
+    timeouts.configure(enabled, safety)
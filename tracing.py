@@ -0,0 +1,201 @@
+import json
+import os
+import sys
+import threading
+import time
+
+class Span:
+    """一个计时区间，结束时写入追踪文件"""
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = dict(getattr(tracer.local, 'context', {}))
+        self.attrs.update(attrs)
+        self.start = time.time()
+        self.ended = False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, **attrs):
+        if self.ended:
+            return
+        self.ended = True
+        self.attrs.update(attrs)
+        self.tracer.write(self.name, self.start, time.time() - self.start, self.attrs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and 'outcome' not in self.attrs:
+            self.attrs['outcome'] = 'error'
+            self.attrs['error'] = str(exc)[:200]
+        self.end()
+        return False
+
+class NullSpan:
+    """追踪关闭时使用的空区间，所有操作都不做任何事"""
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class StageSpans:
+    """按顺序执行的多个阶段：开始下一阶段时自动结束上一阶段
+
+    适合有很多提前return的线性流程，只需在 finally 中调用 close()。
+    """
+
+    def __init__(self, tracer, attrs):
+        self.tracer = tracer
+        self.attrs = attrs
+        self.current = None
+        self.outcome = None
+
+    def stage(self, name, **attrs):
+        if self.current:
+            self.current.end(outcome='ok')
+        self.current = Span(self.tracer, name, dict(self.attrs, **attrs))
+
+    def finish(self, outcome):
+        """记录整个流程的结果，close() 时写到最后一个阶段"""
+        self.outcome = outcome
+
+    def close(self):
+        if self.current:
+            self.current.end(outcome=self.outcome or 'aborted')
+            self.current = None
+
+class NullStageSpans:
+    def stage(self, name, **attrs):
+        pass
+
+    def finish(self, outcome):
+        pass
+
+    def close(self):
+        pass
+
+NULL_STAGES = NullStageSpans()
+
+class Tracer:
+    """把各阶段的耗时写入JSONL文件，可以转换成Chrome trace/Perfetto格式"""
+
+    def __init__(self):
+        self.enabled = False
+        self.file = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def enable(self, path):
+        self.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+        self.enabled = True
+
+    def disable(self):
+        with self.lock:
+            self.enabled = False
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def write(self, name, start, duration, attrs):
+        record = json.dumps({
+            'name': name,
+            'ts': start,
+            'dur': duration,
+            'thread': threading.current_thread().name,
+            'attrs': attrs,
+        }, ensure_ascii=False, default=str)
+        with self.lock:
+            if self.file:
+                self.file.write(record + '\n')
+                self.file.flush()
+
+tracer = Tracer()
+
+def enable_tracing(path):
+    tracer.enable(path)
+
+def disable_tracing():
+    tracer.disable()
+
+def span(name, **attrs):
+    """计时区间，用法：with span('阶段名', key=value) as sp: ...; sp.set(outcome=...)"""
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, attrs)
+
+def stage_spans(**attrs):
+    if not tracer.enabled:
+        return NULL_STAGES
+    return StageSpans(tracer, attrs)
+
+class trace_context:
+    """在当前线程中附加公共属性（类别、产品链接等），其中创建的区间都会带上这些属性"""
+
+    def __init__(self, **attrs):
+        self.attrs = attrs
+        self.previous = None
+
+    def __enter__(self):
+        if tracer.enabled:
+            self.previous = getattr(tracer.local, 'context', {})
+            tracer.local.context = dict(self.previous, **self.attrs)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.previous is not None:
+            tracer.local.context = self.previous
+        return False
+
+def convert_to_chrome_trace(jsonl_path, output_path):
+    """把JSONL追踪文件转换成Chrome trace格式（chrome://tracing 或 ui.perfetto.dev 可以打开）"""
+    events = []
+    thread_ids = {}
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            thread_name = record.get('thread', 'main')
+            if thread_name not in thread_ids:
+                thread_ids[thread_name] = len(thread_ids) + 1
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': 1,
+                    'tid': thread_ids[thread_name], 'args': {'name': thread_name},
+                })
+            events.append({
+                'name': record['name'],
+                'cat': record.get('attrs', {}).get('outcome', ''),
+                'ph': 'X',
+                'ts': int(record['ts'] * 1e6),
+                'dur': int(record['dur'] * 1e6),
+                'pid': 1,
+                'tid': thread_ids[thread_name],
+                'args': record.get('attrs', {}),
+            })
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    return len(events)
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("用法: python tracing.py <追踪文件.jsonl> <输出文件.json>")
+        sys.exit(1)
+    count = convert_to_chrome_trace(sys.argv[1], sys.argv[2])
+    print(f"已转换 {count} 个事件")
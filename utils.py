@@ -1,4 +1,3 @@
-import pandas as pd
 import logging
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -6,128 +5,140 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.common.action_chains import ActionChains
 import os
-import requests
-import zipfile
 import json
 import time
-from PyQt6.QtCore import QSettings
+import shutil
+import re
+import difflib
+import threading
+from urllib.parse import urlsplit, urlunsplit, urlencode, parse_qsl
+from waits import wait_for, wait_until, element_present, element_visible, element_clickable, ACCORDION_OPENED, IN_VIEWPORT
+from timeouts import timeouts
+from tracing import span, stage_spans, trace_context
+from run_control import checkpoint
+from product_index import canonical_product_url, product_id_from_url
 
-def read_categories_from_excel(file_path):
-    try:
-        # 读取Excel文件
-        df = pd.read_excel(file_path, header=None)  # 不使用第一行作为表头
-        # 获取第一列的所有值，包括第一行
-        categories = df.iloc[:, 0].dropna().tolist()
-        return categories if categories else []
-    except Exception as e:
-        logging.error(f"读取Excel类别时出错: {str(e)}")
-        return []
+# 阿里巴巴站点地址，性能测试时可以指向本地模拟站点
+BASE_URL = "https://www.alibaba.com/"
 
-def read_sheet_names_from_excel(file_path):
-    try:
-        # 读取Excel文件的所有sheet名称
-        excel_file = pd.ExcelFile(file_path)
-        sheet_names = excel_file.sheet_names
-        return sheet_names if sheet_names else []
-    except Exception as e:
-        logging.error(f"读取Excel工作表名称时出错: {str(e)}")
-        return []
+# 搜索方式：url 直接打开搜索结果链接（失败时退回搜索框），search_box 使用首页搜索框
+SEARCH_OPTIONS = {
+    'mode': 'url', 'sort': '', 'verified_supplier': False, 'extra_params': '',
+    'target_products': 0, 'max_pages': 50,
+}
 
-def get_chrome_version():
-    try:
-        chrome_path = r'C:\Program Files\Google\Chrome\Application\chrome.exe'
-        if os.path.exists(chrome_path):
-            from win32com.client import Dispatch
-            parser = Dispatch('Scripting.FileSystemObject')
-            version = parser.GetFileVersion(chrome_path)
-            return version
-    except Exception as e:
-        logging.error(f"获取Chrome版本失败: {str(e)}")
-    return None
-
-def get_chromedriver_from_mirrors(version):
-    """从多个镜像源尝试下载ChromeDriver"""
-    mirrors = [
-        {
-            'name': '淘宝镜像',
-            'version_url': f"https://registry.npmmirror.com/-/binary/chromedriver/{version}",
-            'download_url': lambda v: f"https://registry.npmmirror.com/-/binary/chromedriver/{v}/chromedriver_win32.zip"
-        },
-        {
-            'name': '中科大镜像',
-            'version_url': f"https://mirrors.ustc.edu.cn/chromedriver/{version}/",
-            'download_url': lambda v: f"https://mirrors.ustc.edu.cn/chromedriver/{v}/chromedriver_win32.zip"
-        },
-        {
-            'name': '官方源',
-            'version_url': "https://chromedriver.storage.googleapis.com/LATEST_RELEASE_" + version,
-            'download_url': lambda v: f"https://chromedriver.storage.googleapis.com/{v}/chromedriver_win32.zip"
-        }
-    ]
-    
-    for mirror in mirrors:
+# 搜索链接中的排序和筛选参数
+SEARCH_SORT_PARAMS = {
+    'orders': ('sortType', 'TRALV'),
+    'price_asc': ('sortType', 'PRICE_ASC'),
+    'price_desc': ('sortType', 'PRICE_DESC'),
+}
+VERIFIED_SUPPLIER_PARAM = ('assessmentCompany', 'true')
+
+def prepare_worker_profile(user_data_dir, worker_id):
+    """为并行浏览器准备独立的用户数据目录
+
+    Chrome不允许多个实例共用同一个用户数据目录，第0个工作者直接使用原目录，
+    其余工作者使用原目录的副本（首次使用时复制，保留Importify插件和登录状态）。
+    """
+    if not user_data_dir or worker_id == 0:
+        return user_data_dir
+    worker_dir = f"{user_data_dir.rstrip(os.sep + '/')}_worker{worker_id}"
+    if not os.path.exists(worker_dir) and os.path.exists(user_data_dir):
+        logging.info(f"为工作者 {worker_id} 复制用户数据目录: {worker_dir}")
         try:
-            logging.info(f"尝试使用{mirror['name']}下载ChromeDriver...")
-            response = requests.get(mirror['version_url'], timeout=10)
-            
-            if response.status_code == 200:
-                if mirror['name'] == '淘宝镜像':
-                    versions = response.json()
-                    if versions:
-                        latest_version = versions[-1]
-                else:
-                    latest_version = response.text.strip()
-                
-                download_url = mirror['download_url'](latest_version)
-                logging.info(f"从{mirror['name']}下载 ChromeDriver {latest_version}")
-                
-                response = requests.get(download_url, timeout=30)
-                if response.status_code == 200:
-                    return response.content
-                    
-        except Exception as e:
-            logging.warning(f"{mirror['name']}下载失败: {str(e)}")
-            continue
-    
-    return None
+            shutil.copytree(
+                user_data_dir,
+                worker_dir,
+                ignore=shutil.ignore_patterns(
+                    'Singleton*', 'lockfile', 'Cache', 'Code Cache', 'GPUCache',
+                    'ShaderCache', 'GrShaderCache', 'CacheStorage', 'Crashpad'
+                ),
+                ignore_dangling_symlinks=True
+            )
+        except shutil.Error as e:
+            # 被占用的文件会复制失败，其余文件仍然可用
+            logging.warning(f"复制用户数据目录时部分文件被跳过: {len(e.args[0])} 个")
+    return worker_dir
 
-def download_chromedriver():
+# 精简模式：不需要的资源类型对应的URL规则（CDP Network.setBlockedURLs 支持 * 通配符）
+BLOCKED_RESOURCE_PATTERNS = {
+    'image': ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3', '*.flv'],
+    'tracker': [
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*mmstat.com*',
+        '*arms-retcode.aliyuncs.com*', '*bat.bing.com*', '*criteo.*',
+    ],
+}
+
+# 浏览器启动选项，lean为精简模式：无头运行、eager加载策略、屏蔽不需要的资源
+BROWSER_OPTIONS = {
+    'lean': False,
+    'headless': True,
+    'blocked_types': ['image', 'font', 'media', 'tracker'],
+    'blocked_patterns': [],
+}
+
+def set_browser_options(lean=False, headless=True, blocked_types=None, blocked_patterns=None):
+    BROWSER_OPTIONS.update(lean=bool(lean), headless=bool(headless))
+    if blocked_types is not None:
+        BROWSER_OPTIONS['blocked_types'] = [t for t in blocked_types if t in BLOCKED_RESOURCE_PATTERNS]
+    if blocked_patterns is not None:
+        BROWSER_OPTIONS['blocked_patterns'] = [p.strip() for p in blocked_patterns if p.strip()]
+
+def blocked_url_patterns():
+    patterns = []
+    for resource_type in BROWSER_OPTIONS['blocked_types']:
+        patterns.extend(BLOCKED_RESOURCE_PATTERNS[resource_type])
+    patterns.extend(BROWSER_OPTIONS['blocked_patterns'])
+    return patterns
+
+def apply_request_blocking(driver):
+    """在当前标签页中屏蔽不需要的请求（只在精简模式下生效，每个标签页需要单独设置）"""
+    if not BROWSER_OPTIONS['lean']:
+        return
     try:
-        chrome_version = get_chrome_version()
-        if not chrome_version:
-            return None
-            
-        major_version = chrome_version.split('.')[0]
-        
-        # 尝试从镜像下载
-        content = get_chromedriver_from_mirrors(major_version)
-        if not content:
-            logging.error("所有镜像源下载失败")
-            return None
-            
-        # 保存并解压
-        with open("chromedriver.zip", "wb") as f:
-            f.write(content)
-        
-        # 如果存在旧的chromedriver，先删除
-        if os.path.exists("chromedriver.exe"):
-            os.remove("chromedriver.exe")
-        
-        with zipfile.ZipFile("chromedriver.zip", "r") as zip_ref:
-            zip_ref.extractall()
-            
-        os.remove("chromedriver.zip")
-        logging.info("ChromeDriver下载并解压成功")
-        return "chromedriver.exe"
-            
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
     except Exception as e:
-        logging.error(f"下载ChromeDriver失败: {str(e)}")
-    return None
+        logging.warning(f"设置请求屏蔽失败: {str(e)}")
 
-def open_browser(driver_path=None, user_data_dir=None):
+def open_tab(driver, url, switch=True):
+    """在新标签页中打开链接，返回新标签页句柄
+
+    精简模式下先打开空白页并设置请求屏蔽，再跳转到目标链接，保证新标签页的请求也被屏蔽。
+    switch为False时保持在当前标签页，新标签页在后台加载。
+    """
+    current = driver.current_window_handle
+    before = set(driver.window_handles)
+    driver.execute_script("window.open(arguments[0], '_blank')", 'about:blank' if BROWSER_OPTIONS['lean'] else url)
+    handles = [handle for handle in driver.window_handles if handle not in before]
+    if not handles:
+        return None
+    handle = handles[0]
+    if BROWSER_OPTIONS['lean']:
+        driver.switch_to.window(handle)
+        apply_request_blocking(driver)
+        driver.execute_script("window.location.href = arguments[0]", url)
+        if not switch:
+            driver.switch_to.window(current)
+    elif switch:
+        driver.switch_to.window(handle)
+    return handle
+
+def open_browser(driver_path=None, user_data_dir=None, headless=None, on_service=None):
+    """启动Chrome，失败时返回None
+
+    on_service(service) 在启动ChromeDriver之前调用，调用方可以在启动卡住时通过 service.process 结束进程。
+    """
+    lean = BROWSER_OPTIONS['lean']
+    if headless is None:
+        headless = lean and BROWSER_OPTIONS['headless']
     try:
         # 优先使用指定的ChromeDriver路径
         default_driver_path = r'D:\chromedriver-win64\chromedriver.exe'
@@ -146,6 +157,13 @@ def open_browser(driver_path=None, user_data_dir=None):
         chrome_options.add_argument('--disable-translate')
         chrome_options.add_argument('--lang=en-US')
         chrome_options.add_argument('--remote-allow-origins=*')
+        if headless:
+            # 新版无头模式，支持加载插件
+            chrome_options.add_argument('--headless=new')
+            chrome_options.add_argument('--window-size=1920,1080')
+        if lean:
+            # DOMContentLoaded后即返回，不等待图片等资源加载完成
+            chrome_options.page_load_strategy = 'eager'
         
         # 如果提供了用户数据目录，则添加相应选项
         if user_data_dir and os.path.exists(user_data_dir):
@@ -153,269 +171,577 @@ def open_browser(driver_path=None, user_data_dir=None):
             
         # 创建Service对象
         service = Service(executable_path=chrome_driver_path)
+        if on_service:
+            on_service(service)
         
         # 创建WebDriver实例
         driver = webdriver.Chrome(service=service, options=chrome_options)
-        logging.info("成功创建Chrome浏览器实例")
+        # 事件驱动的等待通过异步脚本实现，脚本超时需要大于最长的等待时间
+        driver.set_script_timeout(120)
+        apply_request_blocking(driver)
+        logging.info("成功创建Chrome浏览器实例" + ("（精简模式）" if lean else ""))
         return driver
         
     except Exception as e:
         logging.error(f"创建浏览器实例失败: {str(e)}")
         return None
 
-def process_link(driver, category, sheet_name):
-    max_retries = 3
-    retry_count = 0
+def set_search_options(mode='url', sort='', verified_supplier=False, extra_params='', target_products=0):
+    SEARCH_OPTIONS.update(
+        mode=mode, sort=sort or '', verified_supplier=bool(verified_supplier),
+        extra_params=extra_params or '', target_products=max(0, int(target_products))
+    )
+
+def build_search_url(keyword, page=1):
+    """生成搜索结果页链接，包含设置中的排序和筛选参数"""
+    params = [('fsb', 'y'), ('IndexArea', 'product_en'), ('SearchText', keyword)]
+    if SEARCH_OPTIONS['sort'] in SEARCH_SORT_PARAMS:
+        params.append(SEARCH_SORT_PARAMS[SEARCH_OPTIONS['sort']])
+    if SEARCH_OPTIONS['verified_supplier']:
+        params.append(VERIFIED_SUPPLIER_PARAM)
+    # 其他参数，格式为 key=value&key2=value2
+    params.extend(parse_qsl(SEARCH_OPTIONS['extra_params']))
+    if page > 1:
+        params.append(('page', str(page)))
+    return f"{BASE_URL.rstrip('/')}/trade/search?{urlencode(params)}"
+
+def open_search_url(driver, category):
+    """直接打开搜索结果链接，返回是否成功进入有产品的搜索结果页"""
+    url = build_search_url(category)
+    logging.info(f"打开搜索链接: {url}")
+    driver.get(url)
+    if not wait_for(driver, element_present('.organic-list .fy23-search-card'), timeout=20, name="搜索结果加载", floor=0):
+        logging.error("搜索结果加载超时")
+        return False
+    if not urlsplit(driver.current_url).path.startswith("/trade/search"):
+        logging.error("未能正确跳转到搜索结果页面")
+        return False
+    logging.info("搜索结果加载完成")
+    return True
+
+def navigate_to_search(driver, category):
+    """进入关键词的搜索结果页：优先直接打开链接，失败时使用首页搜索框"""
+    if SEARCH_OPTIONS['mode'] == 'url':
+        try:
+            if open_search_url(driver, category):
+                return True
+        except Exception as e:
+            logging.error(f"打开搜索链接出错: {str(e)}")
+        logging.warning("直接打开搜索链接失败，改用首页搜索框")
+    return search_products(driver, category)
+
+def search_products(driver, category):
+    """打开阿里巴巴主页并搜索关键词，返回是否成功进入搜索结果页"""
+    # 访问阿里巴巴主页
+    url = BASE_URL
+    logging.info(f"访问页面: {url}")
+    driver.get(url)
     
-    logging.info(f"开始处理类别: {category}, 目标分类: {sheet_name}")
+    # 等待页面加载完成
+    try:
+        WebDriverWait(driver, 20).until(
+            lambda d: d.execute_script('return document.readyState') == 'complete'
+        )
+        logging.info("页面加载完成")
+    except TimeoutException:
+        logging.error("页面加载超时")
+        return False
+        
+    driver.switch_to.window(driver.window_handles[0])
     
-    while retry_count < max_retries:
-        try:
-            # 检查driver是否还有效
-            try:
-                driver.current_url
-            except:
-                logging.error("浏览器已关闭，需要重新初始化")
-                # 检查是否处于暂停状态
-                if hasattr(process_link, 'is_paused') and process_link.is_paused:
-                    logging.info("系统处于暂停状态，等待继续...")
-                    while process_link.is_paused:
-                        time.sleep(1)
-                driver = open_browser()
-                if not driver:
-                    return 0
-            
-            # 验证sheet_name
-            if not sheet_name:
-                logging.error(f"类别 '{category}' 没有对应的目标分类")
-                return 0
-            
-            # 访问阿里巴巴主页
-            url = "https://www.alibaba.com/"
-            logging.info(f"访问页面: {url}")
-            driver.get(url)
+    # 等待主要元素出现
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, 'fy23-icbu-search-bar-inner'))
+        )
+        logging.info("搜索栏加载完成")
+    except TimeoutException:
+        logging.error("搜索栏加载超时")
+        return False
+    
+    # 等待搜索框加载
+    logging.info("等待搜索框加载...")
+    search_input = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, 'input.search-bar-input.util-ellipsis'))
+    )
+    
+    # 确保搜索框可以交互
+    WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, 'input.search-bar-input.util-ellipsis'))
+    )
+    
+    # 清除搜索框并输入
+    search_input.clear()
+    time.sleep(1)  # 等待清除完成
+    search_input.send_keys(category)
+    time.sleep(1)  # 等待输入完成
+    
+    # 验证输入是否成功
+    if search_input.get_attribute('value') != category:
+        logging.error(f"搜索关键词输入失败，预期: {category}, 实际: {search_input.get_attribute('value')}")
+        return False
+        
+    logging.info(f"输入搜索关键词: {category}")
+    
+    # 点击搜索按钮
+    search_button = driver.find_element(By.CSS_SELECTOR, 'button.fy23-icbu-search-bar-inner-button')
+    search_button.click()
+    logging.info("点击搜索按钮")
+    
+    # 等待搜索结果加载
+    try:
+        # 等待加载动画消失
+        WebDriverWait(driver, 10).until_not(
+            EC.presence_of_element_located((By.CLASS_NAME, "loading-mask"))
+        )
+        logging.info("搜索结果加载中...")
+        
+        # 等待搜索结果出现
+        WebDriverWait(driver, 20).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "organic-list"))
+        )
+        logging.info("搜索结果加载完成")
+        
+        # 等待一下确保所有元素都加载完成
+        time.sleep(3)
+        
+        # 验证是否在搜索结果页面
+        current_url = driver.current_url
+        if not urlsplit(current_url).path.startswith("/trade/search"):
+            logging.error("未能正确跳转到搜索结果页面")
+            return False
             
-            # 等待页面加载完成
+    except TimeoutException:
+        logging.error("等待搜索结果超时")
+        return False
+
+    return True
+
+# 一次脚本调用读取搜索结果页上所有产品卡片的数据
+SEARCH_CARDS_SCRIPT = """
+function text(card, selectors) {
+    for (var i = 0; i < selectors.length; i++) {
+        var el = card.querySelector(selectors[i]);
+        if (el) { return (el.innerText || el.textContent || '').trim(); }
+    }
+    return '';
+}
+var cards = document.querySelectorAll('.fy23-search-card');
+var result = [];
+for (var i = 0; i < cards.length; i++) {
+    var card = cards[i];
+    var link = card.querySelector('a[href]');
+    if (!link) { continue; }
+    result.push({
+        title: text(card, ['.search-card-e-title']),
+        href: link.href,
+        price: text(card, ['.search-card-e-price-main', '[class*="price"]']),
+        moq: text(card, ['.search-card-m-sale-features__item', '[class*="moq"]']),
+        supplier: text(card, ['.search-card-e-company', '[class*="company"]', '[class*="supplier"]'])
+    });
+}
+return result;
+"""
+
+def extract_search_cards(driver):
+    """读取搜索结果卡片，返回字典列表（title、href、price、moq、supplier）
+
+    所有卡片在一次 execute_script 中读取，返回的是普通数据而不是WebElement，
+    切换窗口后也不会失效。
+    """
+    return driver.execute_script(SEARCH_CARDS_SCRIPT) or []
+
+def collect_product_cards(driver):
+    """滚动搜索结果页并收集产品，返回 (标题, 规范链接) 列表"""
+    # 滚动加载所有产品
+    logging.info("开始滚动加载更多产品...")
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    scroll_attempts = 0
+    max_scrolls = 3  # 限制滚动次数
+    
+    while scroll_attempts < max_scrolls:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(1)
+        new_height = driver.execute_script("return document.body.scrollHeight")
+        if new_height == last_height:
+            break
+        last_height = new_height
+        scroll_attempts += 1
+        logging.info(f"完成第 {scroll_attempts} 次滚动")
+    
+    # 获取产品列表
+    cards = extract_search_cards(driver)
+    logging.info(f"找到 {len(cards)} 个产品")
+
+    products = []
+    for card in cards:
+        product_url = canonical_product_url(card['href'])
+        if product_url:
+            products.append((card['title'], product_url))
+    return products
+
+def search_page_url(url, page):
+    """把搜索结果页链接中的页码替换为 page"""
+    parts = urlsplit(url)
+    params = [(k, v) for k, v in parse_qsl(parts.query) if k != 'page']
+    params.append(('page', str(page)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ''))
+
+def prefetch_search_page(driver, page):
+    """在后台标签页中打开下一页搜索结果，返回新标签页的句柄"""
+    return open_tab(driver, search_page_url(driver.current_url, page), switch=False)
+
+def close_tab(driver, handle):
+    """关闭指定标签页，保持当前标签页不变"""
+    current = driver.current_window_handle
+    try:
+        driver.switch_to.window(handle)
+        driver.close()
+    except Exception as e:
+        logging.error(f"关闭标签页时出错: {str(e)}")
+    finally:
+        driver.switch_to.window(current)
+
+def open_prefetched_page(driver, handle):
+    """关闭当前搜索页，切换到已预加载的下一页，返回下一页是否有产品"""
+    driver.close()
+    driver.switch_to.window(handle)
+    return wait_for(driver, element_present('.organic-list .fy23-search-card'), timeout=20, name="搜索下一页", floor=0)
+
+def harvest_product_urls(driver, category, target=None, on_page=None):
+    """搜索阶段：搜索关键词并逐个产出 (标题, 规范链接)，搜索失败时不产出任何结果
+
+    target 为每个关键词的目标产品数量（默认取设置），为0时只收集第一页。
+    on_page(页码, 产品列表) 在产出每一页的产品之前调用，可以用来按页记录任务日志。
+    需要翻页时，解析当前页的同时在后台标签页中预加载下一页，达到目标数量后立即停止。
+    生成器暂停期间不要用同一个driver做其他操作。
+    """
+    if target is None:
+        target = SEARCH_OPTIONS['target_products']
+    with trace_context(category=category):
+        with span('search') as search_span:
+            found = navigate_to_search(driver, category)
+            search_span.set(outcome='ok' if found else 'failed')
+    if not found:
+        return
+
+    seen = set()
+    count = 0
+    page = 1
+    while True:
+        checkpoint()
+        next_tab = None
+        if target and page < SEARCH_OPTIONS['max_pages']:
             try:
-                WebDriverWait(driver, 20).until(
-                    lambda d: d.execute_script('return document.readyState') == 'complete'
+                next_tab = prefetch_search_page(driver, page + 1)
+            except Exception as e:
+                logging.error(f"预加载第 {page + 1} 页失败: {str(e)}")
+
+        with trace_context(category=category), span('collect_cards', page=page) as collect_span:
+            products = [p for p in collect_product_cards(driver) if p[1] not in seen]
+            if target:
+                products = products[:target - count]
+            collect_span.set(outcome='ok', products=len(products))
+        for product in products:
+            seen.add(product[1])
+        count += len(products)
+        if on_page:
+            on_page(page, products)
+        for product in products:
+            yield product
+
+        if not next_tab:
+            break
+        if not products or count >= target:
+            close_tab(driver, next_tab)
+            break
+        page += 1
+        logging.info(f"类别 '{category}' 已收集 {count}/{target} 个产品，继续第 {page} 页")
+        if not open_prefetched_page(driver, next_tab):
+            logging.info(f"第 {page} 页没有产品，停止翻页")
+            break
+
+    if not count:
+        logging.warning(f"类别 '{category}' 没有找到任何产品")
+
+def import_product(driver, product_title, product_url, category, sheet_name, product_index=None):
+    """导入阶段：在新窗口中打开产品详情页并执行导入
+
+    返回处理结果：imported、exists、region_blocked 或 failed。
+    """
+    with trace_context(category=category, product_url=product_url), span('import_product') as product_span:
+        outcome = 'failed'
+        product_span.set(outcome=outcome)
+        logging.info(f"当前产品标题: {product_title}")
+        original_window = driver.current_window_handle
+        try:
+            # 打开新窗口并切换过去
+            if not open_tab(driver, product_url):
+                raise Exception("无法打开产品窗口")
+        
+            # 等待产品详情页加载
+            with span('detail_page_load'):
+                wait_until(
+                    driver, EC.presence_of_element_located((By.TAG_NAME, "h1")), 60, "详情页加载"
                 )
-                logging.info("页面加载完成")
-            except TimeoutException:
-                logging.error("页面加载超时")
-                return 0
+        
+            # 处理产品详情页操作
+            current_sheet_name = sheet_name
+            if isinstance(sheet_name, list):
+                if sheet_name:  # 确保列表不为空
+                    current_sheet_name = sheet_name[0]
+                else:
+                    logging.error("sheet_name列表为空")
+                    current_sheet_name = None
                 
-            driver.switch_to.window(driver.window_handles[0])
-            
-            # 等待主要元素出现
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, 'fy23-icbu-search-bar-inner'))
-                )
-                logging.info("搜索栏加载完成")
-            except TimeoutException:
-                logging.error("搜索栏加载超时")
-                return 0
+            product_id = product_id_from_url(product_url)
+            outcome = handle_product_actions(
+                driver, category, current_sheet_name,
+                product_index=product_index, product_id=product_id
+            )
+            product_span.set(outcome=outcome)
+            if outcome == 'imported' and product_index is not None:
+                product_index.mark(product_id, 'imported', product_url, category)
             
-            # 处理搜索和产品列表
-            try:
-                # 等待搜索框加载
-                logging.info("等待搜索框加载...")
-                search_input = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'input.search-bar-input.util-ellipsis'))
-                )
-                
-                # 确保搜索框可以交互
-                WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'input.search-bar-input.util-ellipsis'))
-                )
-                
-                # 清除搜索框并输入
-                search_input.clear()
-                time.sleep(1)  # 等待清除完成
-                search_input.send_keys(category)
-                time.sleep(1)  # 等待输入完成
-                
-                # 验证输入是否成功
-                if search_input.get_attribute('value') != category:
-                    logging.error(f"搜索关键词输入失败，预期: {category}, 实际: {search_input.get_attribute('value')}")
-                    return 0
-                    
-                logging.info(f"输入搜索关键词: {category}")
-                
-                # 点击搜索按钮
-                search_button = driver.find_element(By.CSS_SELECTOR, 'button.fy23-icbu-search-bar-inner-button')
-                search_button.click()
-                logging.info("点击搜索按钮")
-                
-                # 等待搜索结果加载
-                try:
-                    # 等待加载动画消失
-                    WebDriverWait(driver, 10).until_not(
-                        EC.presence_of_element_located((By.CLASS_NAME, "loading-mask"))
-                    )
-                    logging.info("搜索结果加载中...")
-                    
-                    # 等待搜索结果出现
-                    WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, "organic-list"))
-                    )
-                    logging.info("搜索结果加载完成")
-                    
-                    # 等待一下确保所有元素都加载完成
-                    time.sleep(3)
-                    
-                    # 验证是否在搜索结果页面
-                    current_url = driver.current_url
-                    if "alibaba.com/trade/search" not in current_url:
-                        logging.error("未能正确跳转到搜索结果页面")
-                        return 0
-                        
-                except TimeoutException:
-                    logging.error("等待搜索结果超时")
-                    return 0
-                
-                # 滚动加载所有产品
-                logging.info("开始滚动加载更多产品...")
-                last_height = driver.execute_script("return document.body.scrollHeight")
-                scroll_attempts = 0
-                max_scrolls = 3  # 限制滚动次数
-                
-                while scroll_attempts < max_scrolls:
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1)
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        break
-                    last_height = new_height
-                    scroll_attempts += 1
-                    logging.info(f"完成第 {scroll_attempts} 次滚动")
-                
-                # 获取产品列表
-                product_list = driver.find_elements(By.CLASS_NAME, "fy23-search-card")
-                num_products = len(product_list)
-                logging.info(f"找到 {num_products} 个产品")
-                
-                if num_products == 0:
-                    logging.warning(f"类别 '{category}' 没有找到任何产品")
-                    return 0
-                
-                # 处理每个产品
-                success_count = 0
-                
-                for product in product_list:
-                    try:
-                        # 获取产品标题和URL
-                        product_title = product.find_element(By.CLASS_NAME, "search-card-e-title")
-                        product_url = product.find_element(By.TAG_NAME, "a").get_attribute("href")
-                        
-                        logging.info(f"当前产品标题: {product_title.text}")
-                        
-                        # 打开新窗口
-                        driver.execute_script(f"window.open('{product_url}')")
-                        
-                        # 获取所有窗口句柄
-                        original_window = driver.current_window_handle
-                        new_window = [handle for handle in driver.window_handles if handle != original_window][0]
-                        
-                        # 切换到新窗口
-                        driver.switch_to.window(new_window)
-                        
-                        # 等待产品详情页加载
-                        product_title = WebDriverWait(driver, 60).until(
-                            EC.presence_of_element_located((By.TAG_NAME, "h1"))
-                        )
-                        
-                        # 处理产品详情页操作
-                        current_sheet_name = sheet_name
-                        if isinstance(sheet_name, list):
-                            if sheet_name:  # 确保列表不为空
-                                current_sheet_name = sheet_name[0]
-                            else:
-                                logging.error("sheet_name列表为空")
-                                current_sheet_name = None
-                                
-                        result = handle_product_actions(driver, category, success_count, current_sheet_name)
-                        
-                        if result > success_count:
-                            success_count = result
-                        
-                        # 关闭新窗口并切回原窗口
-                        try:
-                            # 直接切换回原窗口
-                            driver.switch_to.window(original_window)
-                            
-                            # 关闭其他所有窗口，只保留原窗口
-                            for handle in driver.window_handles:
-                                if handle != original_window:
-                                    driver.switch_to.window(handle)
-                                    driver.close()
-                            
-                            # 最后确保回到原窗口
-                            driver.switch_to.window(original_window)
-                            
-                        except Exception as e:
-                            logging.error(f"处理窗口关闭时出错: {str(e)}")
-                            # 如果出错，尝试切换到任何可用窗口
-                            try:
-                                if driver.window_handles:
-                                    driver.switch_to.window(driver.window_handles[0])
-                            except:
-                                pass
-                            continue
-                        
-                    except Exception as e:
-                        logging.error(f"处理产品时出错: {str(e)}")
-                        try:
-                            # 检查当前窗口是否还存在
-                            try:
-                                driver.current_url
-                                driver.close()
-                            except:
-                                pass
-                            
-                            # 尝试切换回原窗口
-                            try:
-                                driver.switch_to.window(original_window)
-                            except:
-                                # 如果切换失败，尝试切换到任何可用窗口
-                                available_windows = driver.window_handles
-                                if available_windows:
-                                    driver.switch_to.window(available_windows[0])
-                            
-                        except Exception as close_error:
-                            logging.error(f"清理窗口时出错: {close_error}")
-                        continue
-                
-                return success_count
-                
-            except Exception as e:
-                logging.error(f"处理产品列表时出错: {str(e)}")
-                retry_count += 1
-                if retry_count >= max_retries:
-                    return 0
-                time.sleep(2)
-                continue
-                
+        except CollectionNotFoundError:
+            raise
         except Exception as e:
-            logging.error(f"处理类别 '{category}' 出错: {str(e)}")
-            retry_count += 1
-            if retry_count >= max_retries:
-                return 0
-            
+            logging.error(f"处理产品时出错: {str(e)}")
+            outcome = 'failed'
+            product_span.set(outcome=outcome, error=str(e)[:200])
+        finally:
+            # 关闭其他所有窗口，只保留原窗口
             try:
-                driver.quit()
-            except:
-                pass
-            driver = open_browser()
-            if not driver:
-                return 0
-            
-            time.sleep(2)
+                for handle in driver.window_handles:
+                    if handle != original_window:
+                        driver.switch_to.window(handle)
+                        driver.close()
+                driver.switch_to.window(original_window)
+            except Exception as e:
+                logging.error(f"处理窗口关闭时出错: {str(e)}")
+                # 如果出错，尝试切换到任何可用窗口
+                try:
+                    if driver.window_handles:
+                        driver.switch_to.window(driver.window_handles[0])
+                except:
+                    pass
+
+        return outcome
+
+# Importify面板中的Variants按钮
+VARIANTS_BUTTON = 'button.accordion-tab.accordion-custom-tab[data-actab-group="0"][data-actab-id="2"]'
+
+# 点击Draft之后，Importify会显示区域限制、已存在提示或类别选择按钮之一
+# 类别选择按钮在Draft之前就已经在隐藏的表单中，只有显示出来才算有结果
+DRAFT_SETTLED = """
+function visible(el) { return !!el && el.getClientRects().length > 0; }
+if (visible(document.querySelector('button.ms-choice'))) { return true; }
+var message = document.querySelector('div.textcontainer.centeralign.home-content p');
+if (visible(message) && message.textContent.trim()) { return true; }
+return document.body.innerText.indexOf("can't be shipped to your region") >= 0;
+"""
+
+# Importify导入结果提示
+IMPORT_SUCCESS_TEXT = "We have successfully created the product page."
+
+# Importify导入失败时的提示（不区分大小写的子串匹配）。
+# 只列出确认过的失败提示，面板中的其他文字（例如导入额度说明）不当作失败，继续等待结果。
+IMPORT_FAILURE_TEXTS = (
+    "Something went wrong",
+    "An error occurred",
+    "Failed to create the product",
+    "You have reached your import limit",
+)
+
+# 面板中表示错误的提示元素
+IMPORT_ERROR_SELECTOR = '.alert-danger, .text-danger, .error-message, .importify-error'
+
+# 在页面中监听导入结果：在 importify-app-container 上出现成功或失败提示、错误提示元素，
+# 面板被移除或页面关闭时立即给出结果。无法识别的提示文字不算结果，超时时随结果返回最后一次的文字。
+# 监听器和计时从第一次调用开始，保存在页面中；之后每次调用最多等待一个时间片，
+# Python端在两次调用之间响应暂停和停止，不会漏掉时间片之间发生的变化。
+# 返回 {outcome, message, elapsed_ms}，时间片内没有结果时返回null。
+IMPORT_RESULT_SCRIPT = """
+var watchId = arguments[0];
+var timeoutMs = arguments[1];
+var sliceMs = arguments[2];
+var successText = arguments[3];
+var failureTexts = arguments[4].map(function (text) { return text.toLowerCase(); });
+var errorSelector = arguments[5];
+var done = arguments[arguments.length - 1];
+var state = window.__importResultWatch;
+if (!state || state.id !== watchId) {
+    state = window.__importResultWatch = {id: watchId, start: performance.now(), result: null, seen: false, lastText: '', waiters: []};
+    var observer;
+    var settle = function (outcome, message) {
+        if (state.result) { return; }
+        state.result = {outcome: outcome, message: message || '', elapsed_ms: performance.now() - state.start};
+        if (observer) { observer.disconnect(); }
+        clearTimeout(state.timer);
+        state.waiters.splice(0).forEach(function (waiter) { waiter(state.result); });
+    };
+    var classify = function () {
+        var container = document.getElementById('importify-app-container');
+        if (!container) {
+            if (state.seen) { settle('closed', 'Importify面板已关闭'); }
+            return;
+        }
+        state.seen = true;
+        var paragraph = container.querySelector('.home-content p');
+        var text = paragraph ? (paragraph.textContent || '').trim() : '';
+        if (text.indexOf(successText) >= 0) { settle('imported', text); return; }
+        var lower = text.toLowerCase();
+        if (failureTexts.some(function (failure) { return lower.indexOf(failure) >= 0; })) {
+            settle('failed', text);
+            return;
+        }
+        var errorElement = container.querySelector(errorSelector);
+        var errorText = errorElement ? (errorElement.textContent || '').trim() : '';
+        if (errorText) { settle('failed', errorText); return; }
+        if (text) { state.lastText = text; }
+    };
+    observer = new MutationObserver(classify);
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    window.addEventListener('pagehide', function () { settle('closed', '页面已关闭'); });
+    state.timer = setTimeout(function () { settle('timeout', state.lastText); }, timeoutMs);
+    classify();
+}
+if (state.result) { done(state.result); return; }
+var waiter = function (result) { clearTimeout(slice); done(result); };
+var slice = setTimeout(function () {
+    var index = state.waiters.indexOf(waiter);
+    if (index >= 0) { state.waiters.splice(index, 1); }
+    done(null);
+}, sliceMs);
+state.waiters.push(waiter);
+"""
+
+# 等待导入结果时每次脚本调用的最长时间（秒），两次调用之间响应暂停和停止
+IMPORT_RESULT_SLICE = 5
+
+# 下拉列表中出现与目标文本完全匹配的可见选项
+OPTION_VISIBLE = """
+var target = arguments[0];
+var spans = document.querySelectorAll('.ms-drop li:not(.hide) span');
+for (var i = 0; i < spans.length; i++) {
+    if (spans[i].textContent.toLowerCase().trim() === target) { return true; }
+}
+return false;
+"""
+
+# 变体选择策略，见 select_variants
+VARIANT_POLICY = {'policy': 'first', 'count': 1, 'price_min': None, 'price_max': None}
+
+# 一次读取变体表格中每一行的勾选状态、价格和库存
+VARIANT_TABLE_SCRIPT = """
+function number(value) {
+    var match = String(value || '').replace(/,/g, '').match(/-?\\d+(\\.\\d+)?/);
+    return match ? parseFloat(match[0]) : null;
+}
+function field(row, keys) {
+    var nodes = row.querySelectorAll('input, td, span');
+    for (var i = 0; i < nodes.length; i++) {
+        var node = nodes[i];
+        var name = ((node.getAttribute('name') || '') + ' ' + (node.className || '')).toLowerCase();
+        for (var k = 0; k < keys.length; k++) {
+            if (name.indexOf(keys[k]) >= 0) {
+                return node.tagName === 'INPUT' ? node.value : node.textContent;
+            }
+        }
+    }
+    return null;
+}
+var boxes = document.querySelectorAll('#var_price .include_variant');
+var rows = [];
+for (var i = 0; i < boxes.length; i++) {
+    var row = boxes[i].closest('tr') || boxes[i].parentElement;
+    var stock = field(row, ['stock', 'inventory', 'qty', 'quantity']);
+    rows.push({
+        index: i,
+        checked: boxes[i].checked,
+        title: (row.innerText || '').trim().slice(0, 200),
+        price: number(field(row, ['price'])),
+        stock: stock === null ? null : number(stock)
+    });
+}
+return rows;
+"""
+
+# 按下标一次写回所有变体的勾选状态，返回被修改的复选框数量
+APPLY_VARIANTS_SCRIPT = """
+var selected = arguments[0];
+var boxes = document.querySelectorAll('#var_price .include_variant');
+var changed = 0;
+for (var i = 0; i < boxes.length; i++) {
+    var want = selected.indexOf(i) >= 0;
+    if (boxes[i].checked !== want) {
+        boxes[i].click();
+        changed++;
+    }
+}
+return changed;
+"""
+
+def set_variant_policy(policy='first', count=1, price_min=None, price_max=None):
+    VARIANT_POLICY.update(policy=policy, count=max(1, int(count)), price_min=price_min, price_max=price_max)
+
+def read_variant_table(driver):
+    """读取变体表格，返回每行的 index、checked、title、price、stock"""
+    return driver.execute_script(VARIANT_TABLE_SCRIPT) or []
+
+def select_variants(variants, policy='first', count=1, price_min=None, price_max=None):
+    """按策略选择要导入的变体，返回变体下标列表
+
+    first       只导入第一个变体（原来的行为）
+    cheapest    价格最低的 count 个变体
+    in_stock    所有有库存的变体（库存未知的也算有库存）
+    price_band  价格在 [price_min, price_max] 之间的变体
+    没有变体满足条件时退回到第一个变体，保证至少导入一个。
+    """
+    if not variants:
+        return []
+    if policy == 'cheapest':
+        priced = [v for v in variants if v.get('price') is not None]
+        selected = [v['index'] for v in sorted(priced, key=lambda v: v['price'])[:count]]
+    elif policy == 'in_stock':
+        selected = [v['index'] for v in variants if v.get('stock') is None or v['stock'] > 0]
+    elif policy == 'price_band':
+        selected = [
+            v['index'] for v in variants
+            if v.get('price') is not None
+            and (price_min is None or v['price'] >= price_min)
+            and (price_max is None or v['price'] <= price_max)
+        ]
+    else:
+        selected = []
+    return sorted(selected) or [variants[0]['index']]
+
+def apply_variant_selection(driver, selected):
+    return driver.execute_script(APPLY_VARIANTS_SCRIPT, list(selected))
+
+def click_description_tab(driver):
+    """点击描述标签，等待面板切换到可以操作Variants按钮"""
+    description_tab = wait_until(
+        driver, EC.presence_of_element_located((By.XPATH, '//*[@id="description_tab_button"]')), 10, "描述标签"
+    )
+    wait_for(driver, "return arguments[0].offsetParent !== null;", [description_tab], timeout=3, legacy=1, name="描述标签加载")
     
-    return 0
+    # 使用JavaScript点击
+    driver.execute_script("arguments[0].click();", description_tab)
+    logging.info("已点击描述标签")
+    
+    # 等待描述面板展开
+    wait_for(driver, ACCORDION_OPENED, [description_tab], timeout=10, legacy=2, name="描述标签切换")
+
+def handle_product_actions(driver, category, sheet_name, product_index=None, product_id=None):
+    """在产品详情页中通过Importify导入产品，返回 imported、exists、region_blocked 或 failed"""
+    stages = stage_spans()
+
+    def stage(name, **attrs):
+        # 每个阶段开始前响应暂停和停止
+        checkpoint()
+        stages.stage(name, **attrs)
 
-def handle_product_actions(driver, category, success_count, sheet_name):
     try:
         logging.info(f"处理产品详情页操作: {category}, {sheet_name}")
         
@@ -429,18 +755,19 @@ def handle_product_actions(driver, category, success_count, sheet_name):
                 return False
 
         # 点击添加按钮
+        stage('add_button')
         max_retries = 3
         for retry in range(max_retries):
             try:
                 if not check_window():
-                    return success_count
+                    return 'failed'
                     
-                add_btn_con = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="addBtnCon"]')))
+                add_btn_con = wait_until(
+                    driver, EC.element_to_be_clickable((By.XPATH, '//*[@id="addBtnCon"]')), 10, "添加按钮")
                     
                 # 再次检查窗口
                 if not check_window():
-                    return success_count
+                    return 'failed'
                     
                 add_btn_con.click()
                 logging.info("点击了添加按钮")
@@ -448,103 +775,97 @@ def handle_product_actions(driver, category, success_count, sheet_name):
             except Exception as e:
                 if retry == max_retries - 1:
                     logging.error(f"点击添加按钮失败: {str(e)}")
-                    return success_count
+                    return 'failed'
                 time.sleep(2)
                 
                 # 检查窗口是否还存在
                 if not check_window():
-                    return success_count
+                    return 'failed'
 
         # 处理Draft元素
+        stage('draft')
         try:
             if not check_window():
-                return success_count
+                return 'failed'
                 
             # 等待Draft元素可见和可点击，减少等待时间
-            draft_element = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, '//span[@class="inactive" and text()="Draft"]'))
+            draft_element = wait_until(
+                driver, EC.presence_of_element_located((By.XPATH, '//span[@class="inactive" and text()="Draft"]')), 5, "Draft按钮"
             )
             
             if not check_window():
-                return success_count
+                return 'failed'
                 
-            WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.XPATH, '//span[@class="inactive" and text()="Draft"]'))
+            wait_until(
+                driver, EC.element_to_be_clickable((By.XPATH, '//span[@class="inactive" and text()="Draft"]')), 3, "Draft可点击"
             )
             logging.info("成功加载 Draft 元素")
             
             # 再次检查窗口
             if not check_window():
-                return success_count
+                return 'failed'
                 
             # 使用JavaScript点击，更可靠
             driver.execute_script("arguments[0].click();", draft_element)
             logging.info("成功点击 Draft 元素")
-            time.sleep(1)  # 减少等待时间
         except Exception as e:
             logging.error(f"等待和点击 Draft 元素时出错：{e}")
-            return success_count
+            return 'failed'
+
+        # 等待Importify给出下一步内容：区域限制、已存在提示或类别选择按钮，
+        # 取代原来固定的1秒sleep和区域限制、已存在两次3秒的超时等待
+        stage('importify_check')
+        wait_for(driver, DRAFT_SETTLED, timeout=7, legacy=7, name="Draft之后")
 
         # 检查区域限制
-        try:
-            # 减少等待时间到3秒，因为区域限制信息通常会很快显示
-            region_restriction = WebDriverWait(driver, 3).until(
-                EC.presence_of_element_located((By.XPATH, '//div[contains(text(), "Sorry, this product can\'t be shipped to your region.")]'))
-            )
-            if region_restriction.is_displayed():
-                logging.info("检测到产品无法配送到当前区域，跳过处理")
-                return success_count
-        except TimeoutException:
-            logging.info("未检测到区域限制消息，继续处理")
+        region_restriction = driver.find_elements(By.XPATH, '//div[contains(text(), "Sorry, this product can\'t be shipped to your region.")]')
+        if region_restriction and region_restriction[0].is_displayed():
+            logging.info("检测到产品无法配送到当前区域，跳过处理")
+            stages.finish('region_blocked')
+            return 'region_blocked'
+        logging.info("未检测到区域限制消息，继续处理")
 
-        # 检查产品是否已存在（同样减少等待时间）
+        # 检查产品是否已存在
         try:
-            WebDriverWait(driver, 3).until(
-                EC.presence_of_element_located((By.XPATH, '//div[@class="textcontainer centeralign home-content "]'))
-            )
             success_message = driver.find_element(By.XPATH, '//div[@class="textcontainer centeralign home-content "]/p[1]')
             if success_message.text == "This product is already in your store, what would you like to do?":
                 logging.info("产品已存在，不再处理")
-                return success_count
-        except (TimeoutException, NoSuchElementException):
+                stages.finish('exists')
+                if product_index is not None:
+                    product_index.mark(product_id, 'exists', category=category)
+                return 'exists'
+        except NoSuchElementException:
             pass
 
         # 检查sheet_name是否有效
         if not sheet_name:
             logging.error("没有有效的目标分类，跳过类别选择")
-            return success_count
+            return 'failed'
 
         # 选择类别
+        stage('category_select', sheet_name=sheet_name)
+        # 每个浏览器会话第一次遇到类别下拉框时建立索引，并校验全部目标分类
+        get_collection_index(driver)
         try:
             # 首先检查当前选择的类别
             try:
-                current_selection = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'button.ms-choice span'))
+                current_selection = wait_until(
+                    driver, EC.presence_of_element_located((By.CSS_SELECTOR, 'button.ms-choice span')), 5, "当前类别"
                 )
                 if current_selection.text.strip() == sheet_name:
                     logging.info(f"当前已选择正确的类别: {sheet_name}，直接进入下一步")
                     # 直接点击描述标签
                     try:
-                        description_tab = WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.XPATH, '//*[@id="description_tab_button"]'))
-                        )
-                        time.sleep(1)  # 等待一下确保元素完全加载
-                        
-                        # 使用JavaScript点击
-                        driver.execute_script("arguments[0].click();", description_tab)
-                        logging.info("已点击描述标签")
-                        
-                        # 等待一下确保切换完成
-                        time.sleep(2)
+                        click_description_tab(driver)
                     except Exception as e:
                         logging.error(f"点击描述标签失败: {str(e)}")
-                        return success_count
+                        return 'failed'
                 else:
                     # 等待并点击选择按钮
                     for retry in range(max_retries):
                         try:
-                            select_button = WebDriverWait(driver, 10).until(
-                                EC.element_to_be_clickable((By.XPATH, '//button[@class="ms-choice"]'))
+                            select_button = wait_until(
+                                driver, EC.element_to_be_clickable((By.XPATH, '//button[@class="ms-choice"]')), 10, "类别选择按钮"
                             )
                             select_button.click()
                             logging.info("等待并点击选择按钮")
@@ -557,144 +878,274 @@ def handle_product_actions(driver, category, success_count, sheet_name):
                     # 处理下拉选项并等待完成
                     try:
                         fetch_dropdown_options(driver, sheet_name)
+                    except CollectionNotFoundError:
+                        raise
                     except ValueError as ve:
                         logging.error(f"选择类别失败: {ve}")
-                        return success_count
+                        return 'failed'
                     except Exception as e:
                         logging.error(f"选择类别失败: {e}")
-                        return success_count
+                        return 'failed'
 
-                    time.sleep(3)
+                    wait_for(driver, element_clickable(VARIANTS_BUTTON), timeout=10, legacy=3, name="选择类别之后")
+            except CollectionNotFoundError:
+                raise
             except Exception as e:
                 logging.error(f"检查当前选择时出错: {e}")
-                return success_count
+                return 'failed'
 
             # 处理变体
+            stage('variants')
             try:
                 # 首先点击Variants按钮
                 try:
-                    variants_button = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, '//button[@class="accordion-tab accordion-custom-tab" and @data-actab-group="0" and @data-actab-id="2"]'))
+                    variants_button = wait_until(
+                        driver, EC.element_to_be_clickable((By.XPATH, '//button[@class="accordion-tab accordion-custom-tab" and @data-actab-group="0" and @data-actab-id="2"]')), 10, "Variants按钮"
                     )
                     variants_button.click()
                     logging.info("点击了Variants按钮")
-                    time.sleep(2)  # 等待变体面板展开
+                    wait_for(driver, element_visible('#price_switch'), timeout=10, legacy=2, name="变体面板展开")
                 except Exception as e:
                     logging.error(f"点击Variants按钮时出错：{e}")
-                    return success_count
+                    return 'failed'
 
                 # 点击"Select which variants to include"按钮
                 try:
                     # 等待radio按钮可见和可点击
-                    select_variants_radio = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.ID, 'price_switch'))
+                    select_variants_radio = wait_until(
+                        driver, EC.presence_of_element_located((By.ID, 'price_switch')), 10, "变体选项"
                     )
                     
                     # 确保按钮在视图中
                     driver.execute_script("arguments[0].scrollIntoView(true);", select_variants_radio)
-                    time.sleep(1)  # 等待滚动完成
+                    wait_for(driver, IN_VIEWPORT, [select_variants_radio], timeout=3, legacy=1, name="滚动到变体选项")
                     
                     # 使用JavaScript点击radio按钮
                     driver.execute_script("arguments[0].click();", select_variants_radio)
                     logging.info("选择了'Select which variants to include'选项")
-                    time.sleep(2)  # 等待变体选择界面加载
                 except Exception as e:
                     logging.error(f"选择变体选项时出错：{e}")
-                    return success_count
+                    return 'failed'
 
                 # 处理变体选择
                 try:
                     # 等待变体表格完全加载
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.ID, 'var_price'))
-                    )
-                    time.sleep(2)  # 等待表格完全渲染
+                    # 等待表格和其中的变体复选框渲染完成（原来固定sleep 2+2秒）
+                    if not wait_for(driver, element_present('#var_price .include_variant'), timeout=10, legacy=4, name="变体表格渲染"):
+                        wait_until(
+                            driver, EC.presence_of_element_located((By.ID, 'var_price')), 10, "变体表格"
+                        )
 
-                    # 只取消第一个之外的其他变体
+                    # 一次读取变体表格，按选择策略决定要导入的变体，再一次写回勾选状态
                     try:
-                        variant_checkboxes = driver.find_elements(By.CSS_SELECTOR, '.include_variant')
-                        for i, checkbox in enumerate(variant_checkboxes):
-                            if i > 0 and checkbox.is_selected():  # 跳过第一个变体，只取消其他选中的变体
-                                driver.execute_script("arguments[0].click();", checkbox)
-                                time.sleep(0.5)
-                        logging.info("已取消第一个之外的其他变体")
-                        
-                        # 确保第一个变体被选中
-                        first_variant = variant_checkboxes[0]
-                        if not first_variant.is_selected():
-                            driver.execute_script("arguments[0].click();", first_variant)
-                            logging.info("已选中第一个变体")
+                        variants = read_variant_table(driver)
+                        selected = select_variants(variants, **VARIANT_POLICY)
+                        changed = apply_variant_selection(driver, selected)
+                        logging.info(f"按策略 {VARIANT_POLICY['policy']} 选择了 {len(selected)}/{len(variants)} 个变体，修改 {changed} 个复选框")
                             
                     except Exception as e:
                         logging.error(f"处理变体选择时出错：{e}")
 
                 except Exception as e:
                     logging.error(f"处理变体时出错：{e}")
-                    return success_count
+                    return 'failed'
 
             except Exception as e:
                 logging.error(f"处理变体时出错：{e}")
-                return success_count
+                return 'failed'
 
             # 处理图片
+            stage('images')
             try:
-                images_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '//button[@class="accordion-tab accordion-custom-tab" and @data-actab-group="0" and @data-actab-id="3"]'))
+                images_button = wait_until(
+                    driver, EC.element_to_be_clickable((By.XPATH, '//button[@class="accordion-tab accordion-custom-tab" and @data-actab-group="0" and @data-actab-id="3"]')), 10, "图片按钮"
                 )
                 images_button.click()
                 logging.info("点击了图片按钮")
-                time.sleep(2)
+                wait_for(driver, ACCORDION_OPENED, [images_button], timeout=10, legacy=2, name="图片面板展开")
             except Exception as e:
                 logging.error(f"处理图片时出错：{e}")
-                return success_count
+                return 'failed'
 
             # 添加到商店
+            stage('add_to_store')
             try:
-                add_to_store_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, 'addBtnSec'))
+                add_to_store_button = wait_until(
+                    driver, EC.element_to_be_clickable((By.ID, 'addBtnSec')), 10, "添加到商店按钮"
                 )
                 driver.execute_script("arguments[0].scrollIntoView(true);", add_to_store_button)
-                time.sleep(1)  # 等待滚动完成
+                wait_for(driver, IN_VIEWPORT, [add_to_store_button], timeout=3, legacy=1, name="滚动到添加按钮")
                 add_to_store_button.click()
                 logging.info("点击了添加到商店按钮")
 
                 # 等待导入完成
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.ID, 'importify-app-container'))
+                wait_until(
+                    driver, EC.presence_of_element_located((By.ID, 'importify-app-container')), 10, "导入面板"
                 )
                 logging.info("产品正在导入中...")
 
-                # 等待成功消息
-                success = False
-                timeout = 100
-                start_time = time.time()
-                while time.time() - start_time < timeout:
-                    try:
-                        success_message = WebDriverWait(driver, 5).until(
-                            EC.presence_of_element_located((By.XPATH, '//div[@class="textcontainer centeralign home-content "]/p[1]'))
-                        )
-                        if success_message.text == "We have successfully created the product page.":
-                            success_count += 1
-                            logging.info(f"产品导入成功, 总数: {success_count}")
-                            success = True
-                            break
-                    except:
-                        time.sleep(5)
-                
-                if not success:
-                    logging.warning("等待成功消息超时")
+                # 等待导入结果：页面中的MutationObserver在结果出现时立即返回
+                stage('success_poll')
+                # 上限100秒，有足够的历史记录后按实际导入耗时缩短
+                timeout = timeouts.timeout("导入结果", 100)
+                outcome, message, elapsed = wait_import_result(driver, timeout)
+                stages.finish(outcome)
+                if outcome == 'imported':
+                    timeouts.record("导入结果", elapsed)
+                    logging.info(f"产品导入成功（{elapsed:.1f}秒）")
+                    return 'imported'
+                elif outcome == 'failed':
+                    logging.warning(f"Importify导入失败（{elapsed:.1f}秒）: {message}")
+                elif outcome == 'closed':
+                    logging.warning(f"等待导入结果时{message or '窗口已关闭'}")
+                else:
+                    timeouts.miss("导入结果", timeout, 100)
+                    # 超时前出现过无法识别的提示时一并记录，便于补充 IMPORT_FAILURE_TEXTS
+                    logging.warning(f"等待成功消息超时（{timeout:.0f}秒）" + (f"，面板提示: {message}" if message else ""))
 
             except Exception as e:
                 logging.error(f"添加到商店时出错: {e}")
 
+        except CollectionNotFoundError:
+            raise
         except Exception as e:
             logging.error(f"选择类别按钮时出错: {e}")
 
-        return success_count
+        return 'failed'
 
+    except CollectionNotFoundError:
+        raise
     except Exception as e:
         logging.error(f"处理产品操作时出错: {e}")
-        return success_count
+        return 'failed'
+    finally:
+        stages.close()
+
+def wait_import_result(driver, timeout, slice_seconds=IMPORT_RESULT_SLICE):
+    """等待Importify给出导入结果，返回 (结果, 提示文本, 耗时秒)
+
+    结果为 imported（成功）、failed（Importify给出失败提示）、closed（面板或窗口被关闭）或 timeout，
+    超时时提示文本是最后一次出现的无法识别的面板文字。
+    耗时从开始监听算起，由页面中的计时器给出，不受轮询间隔影响。
+    """
+    watch_id = f"{time.time()}-{threading.get_ident()}"
+    start = time.monotonic()
+    while True:
+        checkpoint()
+        try:
+            result = driver.execute_async_script(
+                IMPORT_RESULT_SCRIPT, watch_id, int(timeout * 1000), int(slice_seconds * 1000),
+                IMPORT_SUCCESS_TEXT, list(IMPORT_FAILURE_TEXTS), IMPORT_ERROR_SELECTOR
+            )
+        except WebDriverException as e:
+            # 窗口被关闭或页面跳转后脚本无法返回
+            return 'closed', (e.msg or '窗口已关闭').splitlines()[0], time.monotonic() - start
+        if result:
+            return result['outcome'], result.get('message', ''), result['elapsed_ms'] / 1000
+        # 页面中的计时器会在超时后给出结果，这里只防止页面脚本没有执行
+        if time.monotonic() - start > timeout + slice_seconds * 2:
+            return 'timeout', '', time.monotonic() - start
+
+class CollectionNotFoundError(Exception):
+    """目标分类在商店的类别列表中不存在，继续导入没有意义
+
+    不继承ValueError，避免被选择类别时处理 ValueError 的代码吞掉；沿途的 except 都要先重新抛出。
+    """
+
+# 读取类别下拉框中的全部选项（包括被搜索过滤隐藏的）
+COLLECTION_OPTIONS_SCRIPT = """
+var spans = document.querySelectorAll('.ms-drop li span');
+var names = [];
+for (var i = 0; i < spans.length; i++) {
+    var text = (spans[i].textContent || '').trim();
+    if (text) { names.push(text); }
+}
+return names;
+"""
+
+# 勾选与给定名称完全匹配的类别（参考old.py中的做法）
+SELECT_COLLECTION_SCRIPT = """
+var target = arguments[0];
+var checkboxes = document.querySelectorAll('.ms-drop input[type="checkbox"]');
+for (var i = 0; i < checkboxes.length; i++) {
+    var span = checkboxes[i].nextElementSibling;
+    if (span && (span.textContent || '').toLowerCase().trim() === target) {
+        if (checkboxes[i].checked) { return 'already'; }
+        checkboxes[i].click();
+        return 'selected';
+    }
+}
+return 'missing';
+"""
+
+# 本次运行要用到的全部目标分类，建立索引时统一校验
+TARGET_COLLECTIONS = []
+
+# 每个浏览器会话的类别索引，键为 session_id
+COLLECTION_INDEXES = {}
+COLLECTION_INDEXES_LOCK = threading.Lock()
+
+def normalize_collection_name(name):
+    """只忽略大小写和多余的空白，其他差异（例如 Men/Women、2023/2024）都视为不同的类别"""
+    return ' '.join(str(name).split()).lower()
+
+class CollectionIndex:
+    """商店类别列表的内存索引，忽略大小写和空白匹配"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.by_normalized = {}
+        for name in self.names:
+            self.by_normalized.setdefault(normalize_collection_name(name), name)
+
+    def lookup(self, name):
+        """返回匹配的类别名称，找不到时返回None"""
+        if not name:
+            return None
+        return self.by_normalized.get(normalize_collection_name(name))
+
+    def suggestions(self, name, count=3):
+        """与名称相近的类别，只用于错误提示，不会自动使用"""
+        close = difflib.get_close_matches(normalize_collection_name(name), list(self.by_normalized), n=count, cutoff=0.6)
+        return [self.by_normalized[key] for key in close]
+
+    def missing(self, names):
+        return [name for name in names if not self.lookup(name)]
+
+def set_target_collections(names):
+    TARGET_COLLECTIONS[:] = [name for name in names if name]
+
+def get_collection_index(driver):
+    """返回当前浏览器会话的类别索引，第一次调用时读取下拉框并校验全部目标分类
+
+    类别下拉框还没有渲染时返回None（不缓存），下次再读取。
+    目标分类不在列表中时抛出 CollectionNotFoundError。
+    """
+    session_id = driver.session_id
+    with COLLECTION_INDEXES_LOCK:
+        index = COLLECTION_INDEXES.get(session_id)
+    if index is not None:
+        return index
+
+    names = driver.execute_script(COLLECTION_OPTIONS_SCRIPT) or []
+    if not names:
+        return None
+    index = CollectionIndex(names)
+    logging.info(f"读取到 {len(names)} 个商店类别")
+
+    missing = index.missing(TARGET_COLLECTIONS)
+    if missing:
+        details = []
+        for name in missing:
+            suggestions = index.suggestions(name)
+            details.append(f"{name}（相近的类别: {', '.join(suggestions)}）" if suggestions else name)
+        logging.error(f"以下目标分类在商店中不存在: {'; '.join(details)}")
+        raise CollectionNotFoundError(f"目标分类不存在: {'; '.join(details)}")
+
+    # 校验通过后才缓存，校验失败的会话每次都会重新报错
+    with COLLECTION_INDEXES_LOCK:
+        COLLECTION_INDEXES[session_id] = index
+    return index
 
 def fetch_dropdown_options(driver, sheet_name):
     try:
@@ -712,30 +1163,41 @@ def fetch_dropdown_options(driver, sheet_name):
             
         logging.info(f"处理下拉选项: {sheet_name}")
 
+        # 优先使用会话级的类别索引，一次脚本调用完成勾选
+        collection_index = get_collection_index(driver)
+        option_name = collection_index.lookup(sheet_name) if collection_index else None
+        if option_name:
+            result = driver.execute_script(SELECT_COLLECTION_SCRIPT, option_name.lower())
+            if result != 'missing':
+                logging.info(f"成功选择类别: {option_name}" if result == 'selected' else f"类别已选中: {option_name}")
+                click_description_tab(driver)
+                return
+
         try:
             # 等待下拉菜单完全加载
-            dropdown = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, 'ms-drop'))
+            dropdown = wait_until(
+                driver, EC.presence_of_element_located((By.CLASS_NAME, 'ms-drop')), 10, "下拉菜单"
             )
-            time.sleep(1)  # 额外等待以确保完全加载
+            wait_for(driver, element_visible('.ms-search input[type="text"]'), timeout=10, legacy=1, name="下拉菜单加载")
 
             # 查找并填写搜索框
-            search_box = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, '.ms-search input[type="text"]'))
+            search_box = wait_until(
+                driver, EC.presence_of_element_located((By.CSS_SELECTOR, '.ms-search input[type="text"]')), 10, "下拉搜索框"
             )
             
             # 清除搜索框并输入
             search_box.clear()
-            time.sleep(0.5)
             search_box.send_keys(sheet_name.lower())
-            time.sleep(2)  # 等待搜索结果
 
             # 选择匹配的选项
             target_text = sheet_name.lower().strip()
             
+            # 等待过滤后的列表中出现目标选项（原来固定sleep 0.5+2秒）
+            wait_for(driver, OPTION_VISIBLE, [target_text], timeout=5, legacy=2.5, name="下拉搜索结果")
+            
             # 获取所有可见的选项
-            options = WebDriverWait(driver, 5).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.ms-drop li:not(.hide) span'))
+            options = wait_until(
+                driver, EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.ms-drop li:not(.hide) span')), 5, "下拉选项"
             )
             
             if not options:
@@ -751,24 +1213,14 @@ def fetch_dropdown_options(driver, sheet_name):
                         if not checkbox.is_selected():
                             driver.execute_script("arguments[0].click();", checkbox)
                             logging.info(f"成功选择类别: {option.text}")
-                            time.sleep(1)
+                            wait_for(driver, "return arguments[0].checked;", [checkbox], timeout=3, legacy=1, name="勾选类别")
                             break
                     except Exception as e:
                         logging.error(f"选择选项时出错: {str(e)}")
                         raise
 
             # 点击描述标签
-            description_tab = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="description_tab_button"]'))
-            )
-            time.sleep(1)  # 等待一下确保元素完全加载
-            
-            # 使用JavaScript点击
-            driver.execute_script("arguments[0].click();", description_tab)
-            logging.info("已点击描述标签")
-            
-            # 等待一下确保切换完成
-            time.sleep(2)
+            click_description_tab(driver)
 
         except Exception as e:
             logging.error(f"处理下拉选项时出错: {e}")
@@ -0,0 +1,167 @@
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from timeouts import timeouts
+
+# 条件满足后至少等待的时间（秒），给页面动画和事件处理留出余量
+WAIT_FLOOR = 0.2
+
+# 在页面中执行的等待脚本：条件立即成立则直接返回，
+# 否则注册 MutationObserver，在DOM变化时重新判断，超时返回false。
+# 另外每100ms检查一次，覆盖可见性、样式等不会触发DOM变化的情况。
+# 判断条件直接写进脚本文本（PREDICATE 处），不用 new Function，页面的CSP禁止eval时也能执行。
+# 条件抛出的异常不当作“不成立”吞掉，最后一次的错误随结果返回。
+WAIT_SCRIPT = """
+function predicate() {
+PREDICATE
+}
+var args = arguments[0];
+var timeoutMs = arguments[1];
+var done = arguments[arguments.length - 1];
+var lastError = null;
+function check() {
+    try { lastError = null; return !!predicate.apply(null, args); }
+    catch (e) { lastError = String(e && e.message || e); return false; }
+}
+if (check()) { done({ok: true, error: null}); return; }
+var finished = false;
+var observer = new MutationObserver(function () { if (!finished && check()) { finish(true); } });
+var poll = setInterval(function () { if (!finished && check()) { finish(true); } }, 100);
+var timer = setTimeout(function () { if (!finished) { finish(check()); } }, timeoutMs);
+function finish(result) {
+    finished = true;
+    observer.disconnect();
+    clearInterval(poll);
+    clearTimeout(timer);
+    done({ok: result, error: result ? null : lastError});
+}
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+"""
+
+@lru_cache(maxsize=256)
+def wait_script(predicate):
+    """把判断条件写进等待脚本，同一个条件只拼接一次"""
+    return WAIT_SCRIPT.replace("PREDICATE", predicate, 1)
+
+# 常用的等待条件
+IN_VIEWPORT = (
+    "var r = arguments[0].getBoundingClientRect();"
+    "return r.top >= 0 && r.bottom <= (window.innerHeight || document.documentElement.clientHeight);"
+)
+
+# 折叠面板已展开：按钮标记为展开，或紧跟在按钮后面的内容区域已显示
+ACCORDION_OPENED = (
+    "var button = arguments[0];"
+    "if (button.getAttribute('aria-expanded') === 'true') { return true; }"
+    "var panel = button.nextElementSibling;"
+    "return !!panel && panel.getClientRects().length > 0;"
+)
+
+def element_present(css_selector):
+    """生成“元素已存在”的判断脚本（隐藏的元素也算存在）"""
+    return f"return !!document.querySelector({json.dumps(css_selector)});"
+
+def element_visible(css_selector):
+    """生成“元素已显示”的判断脚本：自身或父元素 display:none、visibility:hidden 时不成立"""
+    return (
+        f"var el = document.querySelector({json.dumps(css_selector)});"
+        "return !!el && el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';"
+    )
+
+def element_clickable(css_selector):
+    """生成“元素已显示且可点击”的判断脚本"""
+    return element_visible(css_selector).replace("return !!el &&", "return !!el && !el.disabled &&", 1)
+
+class WaitLedger:
+    """统计每个等待点原来固定sleep的时长与实际等待时长"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sites = {}
+
+    def record(self, name, legacy, actual):
+        with self.lock:
+            count, legacy_total, actual_total = self.sites.get(name, (0, 0.0, 0.0))
+            self.sites[name] = (count + 1, legacy_total + legacy, actual_total + actual)
+
+    def reset(self):
+        with self.lock:
+            self.sites.clear()
+
+    def report(self):
+        """返回报告文本：每个等待点的次数、原sleep总时长、实际等待总时长"""
+        with self.lock:
+            sites = sorted(self.sites.items(), key=lambda item: item[1][1] - item[1][2], reverse=True)
+        if not sites:
+            return "没有等待记录"
+        lines = []
+        legacy_sum = actual_sum = 0.0
+        for name, (count, legacy_total, actual_total) in sites:
+            legacy_sum += legacy_total
+            actual_sum += actual_total
+            lines.append(f"  {name}: {count} 次, 原sleep {legacy_total:.1f}s, 实际等待 {actual_total:.1f}s")
+        lines.insert(0, f"等待统计: 原sleep共 {legacy_sum:.1f}s, 实际等待共 {actual_sum:.1f}s, 节省 {legacy_sum - actual_sum:.1f}s")
+        return "\n".join(lines)
+
+wait_ledger = WaitLedger()
+
+def set_wait_floor(seconds):
+    global WAIT_FLOOR
+    WAIT_FLOOR = max(0.0, float(seconds))
+
+def wait_for(driver, predicate, args=None, timeout=10, legacy=0, name=None, floor=None):
+    """等待页面条件成立，条件满足时立即返回
+
+    predicate 是一段在页面中执行的JS函数体（可以通过arguments读取args，
+    args中可以包含WebElement），返回真值表示条件成立；条件抛出异常或脚本无法执行时记录警告。
+    legacy 是该处原来固定sleep的秒数，只用于统计报告。
+    指定 name 时超时由 timeouts 按该等待点的历史耗时缩短，timeout 是上限。
+    返回条件是否在超时前成立。
+    """
+    floor = WAIT_FLOOR if floor is None else floor
+    label = name or predicate[:40]
+    limit = timeouts.timeout(name, timeout) if name else timeout
+    start = time.monotonic()
+    # 脚本出错（条件写错、页面跳转、窗口关闭）不是超时，不影响自适应超时
+    failed = False
+    try:
+        outcome = driver.execute_async_script(wait_script(predicate), args or [], int(limit * 1000)) or {}
+        result = bool(outcome.get('ok'))
+        if not result and outcome.get('error'):
+            failed = True
+            logging.warning(f"等待条件 '{label}' 的判断脚本出错: {outcome['error']}")
+    except TimeoutException:
+        # 驱动的脚本超时短于等待时间，按超时处理
+        result = False
+    except WebDriverException as e:
+        failed = True
+        result = False
+        logging.warning(f"等待条件 '{label}' 时脚本执行出错: {(e.msg or str(e) or type(e).__name__).splitlines()[0]}")
+    elapsed = time.monotonic() - start
+    if name and not failed:
+        if result:
+            timeouts.record(name, elapsed)
+        else:
+            timeouts.miss(name, limit, timeout)
+    if elapsed < floor:
+        time.sleep(floor - elapsed)
+        elapsed = floor
+    if legacy:
+        wait_ledger.record(label, legacy, elapsed)
+    return result
+
+def wait_until(driver, condition, timeout, name):
+    """WebDriverWait(driver, timeout).until(condition)，超时由 timeouts 按该等待点的历史耗时缩短"""
+    limit = timeouts.timeout(name, timeout)
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, limit).until(condition)
+    except TimeoutException:
+        timeouts.miss(name, limit, timeout)
+        raise
+    timeouts.record(name, time.monotonic() - start)
+    return result